@@ -0,0 +1,182 @@
+# Local stand-in for the OpenAI API used by the benchmarks
+# Serves /v1/embeddings and /v1/chat/completions (plain and streamed) with
+# deterministic results: embeddings are hashed bags of words, so texts sharing
+# words are similar and retrieval behaves sensibly, and completions are built from
+# the words of the prompt. An optional latency per request simulates the network.
+# Point the project at it with OPENAI_BASE_URL / OPENAI_API_BASE = server.base_url.
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Dimensions of the fake embeddings
+EMBEDDING_DIMENSIONS = 256
+
+# Words of every fake completion
+COMPLETION_WORDS = 120
+
+
+# Unit vector of the hashed words of a text
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> list:
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        digest = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "big")
+        vector[digest % dimensions] += 1.0 if digest & 1 << 31 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0], norm = 1.0, 1.0
+    return (vector / norm).tolist()
+
+
+# Markdown answer made of words of the prompt, the same for the same prompt
+def fake_completion(prompt: str, words: int = COMPLETION_WORDS) -> str:
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    vocabulary = re.findall(r"[A-Za-z]{3,}", prompt) or ["answer"]
+    body = [rng.choice(vocabulary) for _ in range(words)]
+    bullets = "\n".join(f"- {' '.join(body[i : i + 8])}" for i in range(0, 40, 8))
+    return f"# {' '.join(body[:4]).title()}\n\n{' '.join(body[40:])}.\n\n{bullets}\n"
+
+
+class FakeOpenAIServer:
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.requests[name] += amount
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                if server.latency:
+                    time.sleep(server.latency)
+                if self.path.endswith("/embeddings"):
+                    self._embeddings(body)
+                elif self.path.endswith("/chat/completions"):
+                    self._chat(body)
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def _embeddings(self, body):
+                inputs = body["input"]
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                server._count("embeddings")
+                server._count("embedded_inputs", len(inputs))
+                data = [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": fake_embedding(text),
+                    }
+                    for i, text in enumerate(inputs)
+                ]
+                tokens = sum(len(text.split()) for text in inputs)
+                self._send_json(
+                    200,
+                    {
+                        "object": "list",
+                        "data": data,
+                        "model": body["model"],
+                        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                    },
+                )
+
+            def _chat(self, body):
+                server._count("chat_completions")
+                prompt = "\n".join(
+                    message.get("content") or "" for message in body["messages"]
+                )
+                answer = fake_completion(prompt)
+                usage = {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(answer.split()),
+                    "total_tokens": len(prompt.split()) + len(answer.split()),
+                }
+                if body.get("stream"):
+                    self._stream(body, answer)
+                    return
+                self._send_json(
+                    200,
+                    {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": answer},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": usage,
+                    },
+                )
+
+            # Server-sent events, one chunk per word
+            def _stream(self, body, answer):
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("connection", "close")
+                self.end_headers()
+                for word in re.findall(r"\S+\s*", answer):
+                    chunk = {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"role": "assistant", "content": word},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                    self.wfile.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _send_json(self, status, payload):
+                content = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
@@ -0,0 +1,86 @@
+# Local HTTP server for the saved pages of benchmarks/fixtures/pages
+# /<name>.html serves the page with an ETag and answers conditional GETs with 304,
+# like most real sites. The query string is ignored, so /page.html?n=1, ?n=2, ...
+# are distinct URLs (and cache entries) for the same page. An optional latency
+# per request simulates slow sites.
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+from urllib.parse import urlsplit
+
+FIXTURE_PAGES = Path(__file__).parent / "fixtures" / "pages"
+
+
+class FixtureServer:
+
+    def __init__(self, pages_dir: Path = FIXTURE_PAGES, latency: float = 0.0):
+        self.pages = {
+            path.name: path.read_bytes() for path in sorted(pages_dir.glob("*.html"))
+        }
+        self.latency = latency
+        self.responses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    # count distinct URLs, cycling through the pages
+    def urls(self, count: int) -> List[str]:
+        names = list(self.pages)
+        return [f"{self.base_url}/{names[i % len(names)]}?n={i}" for i in range(count)]
+
+    def start(self) -> "FixtureServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                content = server.pages.get(urlsplit(self.path).path.lstrip("/"))
+                if content is None:
+                    self._respond(404, b"not found", {})
+                    return
+
+                etag = '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+                if self.headers.get("if-none-match") == etag:
+                    self._respond(304, b"", {"etag": etag})
+                    return
+                self._respond(
+                    200,
+                    content,
+                    {"etag": etag, "content-type": "text/html; charset=utf-8"},
+                )
+
+            def _respond(self, status, content, headers):
+                with server._lock:
+                    server.responses[status] += 1
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("content-length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
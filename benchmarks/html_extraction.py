@@ -0,0 +1,94 @@
+# Benchmark of the HTML extraction backends over a corpus of saved pages
+# Reports the parse + extraction time per page of every available backend and how
+# closely its output matches the reference backend (bs4, the original extractor).
+#
+# Usage: python -m benchmarks.html_extraction [pages_dir] [--repeat N]
+# (pages_dir defaults to benchmarks/fixtures/pages, any folder of saved .html works)
+
+import argparse
+import statistics
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from src.generate_md.core.html_extractors import (
+    HTML_BACKENDS,
+    LexborHTMLParser,
+    extract_text,
+)
+
+FIXTURE_PAGES = Path(__file__).parent / "fixtures" / "pages"
+
+REFERENCE_BACKEND = "bs4"
+
+
+# Word-level similarity of two extracted texts (1.0 = identical)
+def text_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+# Median seconds to extract one page with a backend
+def time_extraction(html: bytes, backend: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_text(html, backend)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends")
+    parser.add_argument("pages_dir", nargs="?", type=Path, default=FIXTURE_PAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = sorted(args.pages_dir.glob("*.html"))
+    if not pages:
+        print(f"No .html files in {args.pages_dir}")
+        return
+
+    backends = [
+        backend
+        for backend in HTML_BACKENDS
+        if backend != "selectolax" or LexborHTMLParser is not None
+    ]
+    print(f"{len(pages)} pages, backends: {', '.join(backends)}\n")
+
+    totals = {backend: 0.0 for backend in backends}
+    similarities = {backend: [] for backend in backends}
+    header = f"{'page':<32}{'KB':>6}" + "".join(
+        f"{backend + ' ms':>16}" for backend in backends
+    )
+    print(header)
+
+    for page in pages:
+        html = page.read_bytes()
+        reference = extract_text(html, REFERENCE_BACKEND)
+        row = f"{page.name[:31]:<32}{len(html) // 1024:>6}"
+
+        for backend in backends:
+            seconds = time_extraction(html, backend, args.repeat)
+            totals[backend] += seconds
+            similarities[backend].append(
+                text_similarity(reference, extract_text(html, backend))
+            )
+            row += f"{seconds * 1000:>16.2f}"
+        print(row)
+
+    print()
+    for backend in backends:
+        speedup = totals[REFERENCE_BACKEND] / totals[backend] if totals[backend] else 0
+        print(
+            f"{backend:<12} total {totals[backend] * 1000:8.1f} ms  "
+            f"speedup x{speedup:5.1f}  "
+            f"output similarity to {REFERENCE_BACKEND}: "
+            f"mean {statistics.mean(similarities[backend]):.3f}, "
+            f"min {min(similarities[backend]):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
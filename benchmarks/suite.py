@@ -0,0 +1,322 @@
+# End-to-end benchmark suite, fully offline and reproducible
+# Generates a synthetic vault, points the project at a local fake OpenAI server
+# and a local page server, and measures in a throwaway data dir:
+# - index build time, cold (nothing cached) and warm (persisted index reloaded)
+# - vault query latency (p50/p95, answer cache off) and keyword search latency
+# - find_similar_documents() latency (folder suggestions)
+# - scrape throughput, cold (downloads) and warm (page cache), and note
+#   generation throughput
+# - peak RSS after every phase
+# Results are written as JSON; --compare prints the change against an earlier run.
+#
+# Usage: python -m benchmarks.suite [--notes N] [--queries N] [--output FILE]
+#                                   [--compare BASELINE] [--latency-ms N]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is not reported there
+    resource = None
+
+from .fake_openai import FakeOpenAIServer
+from .fixture_server import FixtureServer
+from .synthetic_vault import generate_vault, sample_note, sample_questions
+
+API_KEY = "sk-benchmark"
+LLM_MODEL = "gpt-4o-mini"
+
+# Metrics where a higher value is better (all others are times or sizes)
+_HIGHER_IS_BETTER = ("per_second",)
+
+
+# Peak resident memory of this process so far, in MB
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# Latency percentiles of repeated calls, in milliseconds
+def latency_stats(seconds: List[float]) -> dict:
+    ordered = sorted(seconds)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+    }
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _timed(function: Callable) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+# The project prints progress and answers, benchmarks only report numbers
+@contextlib.contextmanager
+def _quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_index(vault: Path, openai_server: FakeOpenAIServer) -> dict:
+    from src.vault_rag.vault_rag import VaultRAG
+
+    requests_before = openai_server.requests["embeddings"]
+    with _quiet():
+        cold = VaultRAG(str(vault), API_KEY, LLM_MODEL)
+        cold_seconds = _timed(cold.build_rag)
+    embedding_requests = openai_server.requests["embeddings"] - requests_before
+    cold._close_keyword_index()
+
+    # A new session over the unchanged vault loads the persisted index
+    with _quiet():
+        warm = VaultRAG(str(vault), API_KEY, LLM_MODEL)
+        warm_seconds = _timed(warm.build_rag)
+
+    return {
+        "rag": warm,
+        "results": {
+            "documents": len(warm.manifest),
+            "chunks": len(warm.index.docstore.docs),
+            "embedding_requests": embedding_requests,
+            "cold_build_seconds": round(cold_seconds, 3),
+            "warm_build_seconds": round(warm_seconds, 3),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+    }
+
+
+def bench_queries(rag, questions: List[str]) -> dict:
+    timings, failures = [], 0
+    with _quiet():
+        for question in questions:
+            start = time.perf_counter()
+            result = rag.query(question, stream=False)
+            timings.append(time.perf_counter() - start)
+            failures += not result["success"]
+
+        search_timings = [
+            _timed(lambda: rag.search_notes(question)) for question in questions
+        ]
+
+    return {
+        "query": {
+            **latency_stats(timings),
+            "failures": failures,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "keyword_search": latency_stats(search_timings),
+    }
+
+
+def bench_similar(rag, count: int) -> dict:
+    notes = [sample_note(seed) for seed in range(count)]
+    with _quiet():
+        timings = [_timed(lambda: rag.find_similar_documents(note)) for note in notes]
+    return {**latency_stats(timings), "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_scrape(fixture_server: FixtureServer, url_count: int) -> dict:
+    from src.generate_md.core.website_scraper import scrape_urls
+
+    urls = fixture_server.urls(url_count)
+    results = {}
+    # Cold downloads and parses every page, warm serves them from the page cache
+    for run in ["cold", "warm"]:
+        with _quiet():
+            start = time.perf_counter()
+            contents = scrape_urls(urls)
+            seconds = time.perf_counter() - start
+        failures = sum(content.startswith("Error") for content in contents)
+        results[run] = {
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(len(urls) / seconds, 1),
+            "failures": failures,
+        }
+    results["peak_rss_mb"] = peak_rss_mb()
+    return {"contents": contents, "urls": urls, "results": results}
+
+
+def bench_generate(urls: List[str], contents: List[str], notes: int) -> dict:
+    from src.generate_md.core.page_generator import generate_markdown_from_content
+
+    sources = [{"url": url, "content": content} for url, content in zip(urls, contents)]
+    timings = []
+    with _quiet():
+        for i in range(notes):
+            # Three sources per note, like a typical request
+            batch = [sources[(i * 3 + j) % len(sources)] for j in range(3)]
+            timings.append(
+                _timed(
+                    lambda: generate_markdown_from_content(
+                        batch, f"Write a note about page {i}", API_KEY, LLM_MODEL
+                    )
+                )
+            )
+
+    total = sum(timings)
+    return {
+        **latency_stats(timings),
+        "notes_per_second": round(len(timings) / total, 2) if total else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Numeric metrics of a result tree as {"phase.metric": value}
+def _flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+# Print every metric of both runs and how much it changed
+def print_comparison(baseline: dict, current: dict) -> None:
+    old = _flatten(baseline["results"])
+    new = _flatten(current["results"])
+    print(
+        f"\n{'metric':<44}{baseline['meta'].get('commit') or 'baseline':>12}"
+        f"{current['meta'].get('commit') or 'current':>12}  change"
+    )
+    for name in sorted(old.keys() & new.keys()):
+        change = ""
+        if old[name]:
+            percent = (new[name] - old[name]) / old[name] * 100
+            better = (percent > 0) == name.endswith(_HIGHER_IS_BETTER)
+            change = f"{percent:+.1f}%"
+            # Small differences are usually noise
+            if abs(percent) >= 5:
+                change += " better" if better else " worse"
+        print(f"{name:<44}{old[name]:>12}{new[name]:>12}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--notes", type=int, default=500, help="notes in the vault")
+    parser.add_argument("--folders", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--similar", type=int, default=30)
+    parser.add_argument("--urls", type=int, default=32, help="pages per scrape run")
+    parser.add_argument("--generate", type=int, default=5, help="notes generated")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="simulated latency of every fake OpenAI and page request",
+    )
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--compare", type=Path, help="earlier results to compare to")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    openai_server = FakeOpenAIServer(latency).start()
+    fixture_server = FixtureServer(latency=latency).start()
+
+    with tempfile.TemporaryDirectory(prefix="ragsody-bench-") as tmp:
+        # Everything the project caches goes to the throwaway data dir
+        os.environ.update(
+            {
+                "RAGSODY_DATA_DIR": str(Path(tmp) / "data"),
+                "OPENAI_BASE_URL": openai_server.base_url,
+                "OPENAI_API_BASE": openai_server.base_url,
+                "OPENAI_API_KEY": API_KEY,
+                "ANSWER_CACHE_TTL_HOURS": "0",
+            }
+        )
+
+        vault = Path(tmp) / "vault"
+        start = time.perf_counter()
+        generate_vault(vault, args.notes, args.folders, args.seed)
+        print(f"Generated {args.notes} notes in {time.perf_counter() - start:.1f}s")
+
+        results = {}
+        index = bench_index(vault, openai_server)
+        results["index"] = index["results"]
+        print(f"index: {results['index']}")
+
+        rag = index["rag"]
+        results.update(bench_queries(rag, sample_questions(args.queries, args.seed)))
+        print(f"query: {results['query']}")
+        print(f"keyword_search: {results['keyword_search']}")
+        results["find_similar"] = bench_similar(rag, args.similar)
+        print(f"find_similar: {results['find_similar']}")
+
+        scrape = bench_scrape(fixture_server, args.urls)
+        results["scrape"] = scrape["results"]
+        print(f"scrape: {results['scrape']}")
+        results["generate"] = bench_generate(
+            scrape["urls"], scrape["contents"], args.generate
+        )
+        print(f"generate: {results['generate']}")
+        rag._close_keyword_index()
+
+    results["fake_openai_requests"] = dict(openai_server.requests)
+    results["peak_rss_mb"] = peak_rss_mb()
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+            },
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print_comparison(json.loads(args.compare.read_text()), report)
+
+    openai_server.stop()
+    fixture_server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Deterministic synthetic Obsidian vaults for benchmarks
+# Notes are spread over nested folders and have YAML frontmatter (tags, aliases),
+# heading sections, lists, code blocks, block ids and wikilinks to other notes.
+# The same size and seed always produce the same vault.
+#
+# Usage: python -m benchmarks.synthetic_vault out_dir [--notes N] [--folders N] [--seed N]
+
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+# Words notes are written with, the first ones also name folders, tags and topics
+TOPICS = """
+    python rust databases networking security gardening cooking travel finance
+    fitness music photography history astronomy chemistry writing design linux
+    kubernetes statistics economics philosophy languages robotics
+""".split()
+
+_WORDS = TOPICS + """
+    index query cache latency vector model budget schedule garden recipe journey
+    portfolio workout melody camera archive planet molecule chapter layout kernel
+    cluster sample market argument grammar sensor protocol packet thread memory disk
+    backup review idea project meeting deadline draft result experiment measure
+    compare improve reduce build deploy explain remember plan track test fast slow
+    simple careful weekly daily important open the a of and to in with for on about
+    from
+""".split()
+
+_NOUNS = [
+    "notes",
+    "guide",
+    "checklist",
+    "log",
+    "ideas",
+    "overview",
+    "reference",
+    "questions",
+    "summary",
+    "plan",
+    "experiments",
+    "reading list",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, titles: List[str]) -> str:
+    sentences = [_sentence(rng) for _ in range(rng.randint(2, 5))]
+    # Link to other notes, sometimes with an alias
+    for _ in range(rng.randint(0, 2)):
+        target = rng.choice(titles)
+        link = f"[[{target}]]" if rng.random() < 0.7 else f"[[{target}|see here]]"
+        position = rng.randrange(len(sentences))
+        sentences[position] = sentences[position][:-1] + f", see {link}."
+    return " ".join(sentences)
+
+
+def _note(rng: random.Random, title: str, topic: str, titles: List[str]) -> str:
+    tags = sorted({topic} | {rng.choice(TOPICS) for _ in range(rng.randint(0, 2))})
+    lines = ["---", f"tags: [{', '.join(tags)}]"]
+    if rng.random() < 0.3:
+        lines.append(f"aliases: [{title.lower()}]")
+    lines += [f"created: 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"]
+    lines += ["---", "", f"# {title}", "", _paragraph(rng, titles), ""]
+
+    for _ in range(rng.randint(2, 5)):
+        lines += [f"## {_sentence(rng)[:-1].title()[:40]}", ""]
+        for _ in range(rng.randint(1, 3)):
+            lines += [_paragraph(rng, titles), ""]
+        if rng.random() < 0.3:
+            lines += [f"- {_sentence(rng)}" for _ in range(rng.randint(2, 5))] + [""]
+        if rng.random() < 0.15:
+            lines += [
+                "```python",
+                f"def {rng.choice(TOPICS)}():",
+                "    pass",
+                "```",
+                "",
+            ]
+        if rng.random() < 0.2:
+            lines += [f"{_sentence(rng)} ^block-{rng.randint(1000, 9999)}", ""]
+
+    return "\n".join(lines)
+
+
+# Title of every note of a vault, in generation order
+def note_titles(notes: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(TOPICS).title()} {rng.choice(_NOUNS)} {i}" for i in range(notes)
+    ]
+
+
+# Write a vault of the given size into path, returns the paths of the notes
+def generate_vault(
+    path: Path, notes: int, folders: int = 10, seed: int = 0
+) -> List[Path]:
+    rng = random.Random(seed)
+    titles = note_titles(notes, seed)
+
+    # Nested folders named after topics, e.g. "python/databases"
+    folder_paths = [Path(".")]
+    for i in range(folders):
+        parent = rng.choice(folder_paths) if i and rng.random() < 0.4 else Path(".")
+        folder_paths.append(parent / f"{TOPICS[i % len(TOPICS)]}-{i}")
+
+    paths = []
+    for title in titles:
+        topic = title.split()[0].lower()
+        note_path = path / rng.choice(folder_paths) / f"{title}.md"
+        note_path.parent.mkdir(parents=True, exist_ok=True)
+        note_path.write_text(_note(rng, title, topic, titles), encoding="utf-8")
+        paths.append(note_path)
+    return paths
+
+
+# A new note in the style of the vault, not part of it (for folder suggestions)
+def sample_note(seed: int) -> str:
+    rng = random.Random(seed)
+    topic = rng.choice(TOPICS)
+    return _note(rng, f"{topic.title()} draft", topic, note_titles(10, seed))
+
+
+# Questions about the topics the vault is written about
+def sample_questions(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    templates = [
+        "What do my notes say about {} and {}?",
+        "Summarize my {} notes, especially the {} parts.",
+        "How did I plan to improve {} with {}?",
+    ]
+    return [
+        rng.choice(templates).format(rng.choice(TOPICS), rng.choice(_WORDS[24:60]))
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Obsidian vault")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--folders", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_vault(args.out_dir, args.notes, args.folders, args.seed)
+    size = sum(path.stat().st_size for path in paths)
+    print(f"Wrote {len(paths)} notes ({size // 1024} KB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# Private asyncio event loop running on a daemon thread
+# Async HTTP clients bind their connection pool to the loop they first run on.
+# Running every call of a client on one long-lived loop lets all calls reuse its
+# pool, whether they come from sync code, other threads or another event loop.
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, Optional
+
+
+class BackgroundLoop:
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    # Schedule a coroutine on the loop (started on first use), from any thread
+    def submit(self, coro: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                thread.start()
+            return self._loop
@@ -0,0 +1,157 @@
+# Headless answering of vault questions, for scripts, reports and evaluation sets
+# Questions are read from a file or stdin, one per line: plain text, or a JSON
+# object with "question" and an optional "id". They are answered concurrently
+# against one loaded index (at most `concurrency` at a time), the index daemon's
+# when one is running, and every result is written as one JSON line, in input
+# order, with its latency and token usage.
+# Status messages and the summary go to stderr so the results can be piped.
+
+import contextlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterable, List, Optional
+
+from rich.console import Console
+
+from .env_setup import load_env_config
+from .vault_access import connect_daemon, query_vault
+
+
+# Parse question lines, blank lines and lines starting with # are skipped
+def read_questions(lines: Iterable[str]) -> List[dict]:
+    questions = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                item = json.loads(line)
+                questions.append({"id": item.get("id"), "question": item["question"]})
+            except (ValueError, KeyError, AttributeError):
+                raise ValueError(
+                    f"Line {number}: expected a JSON object with a question"
+                )
+        else:
+            questions.append({"id": None, "question": line})
+    return questions
+
+
+# Answer the questions of source (a path, "-" for stdin) and write JSONL results to
+# output (a path, None for stdout). Returns the exit code: 0 if every question was
+# answered, 1 if some failed and 2 if the batch could not run
+def run_batch(
+    source: str,
+    output: Optional[str] = None,
+    concurrency: int = 4,
+    mode: Optional[str] = None,
+    use_daemon: bool = True,
+) -> int:
+    results_file = sys.stdout
+    console = Console(stderr=True)
+
+    try:
+        if source == "-":
+            questions = read_questions(sys.stdin)
+        else:
+            with open(source, "r", encoding="utf-8") as f:
+                questions = read_questions(f)
+        vault_path, api_key, llm_model = load_env_config()
+    except (OSError, ValueError, RuntimeError) as e:
+        console.print(f"[red]{e}[/red]")
+        return 2
+    if not questions:
+        console.print("[red]No questions to answer[/red]")
+        return 2
+
+    # Everything the RAG system prints goes to stderr, stdout only gets results
+    with contextlib.ExitStack() as stack:
+        if output is not None:
+            results_file = stack.enter_context(open(output, "w", encoding="utf-8"))
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+
+        status = connect_daemon(vault_path, llm_model) if use_daemon else None
+        if status is not None:
+            console.print(
+                f"[dim italic]Using the index daemon (pid {status['pid']})[/dim italic]"
+            )
+        else:
+            from .vault_rag.vault_rag import initialize_rag
+
+            try:
+                initialize_rag(vault_path, api_key, llm_model)
+            except Exception as e:
+                console.print(f"[red]RAG system could not be initialized: {e}[/red]")
+                return 2
+        console.print(
+            f"[dim italic]Answering {len(questions)} questions, "
+            f"{concurrency} at a time...[/dim italic]"
+        )
+        return _answer_all(console, questions, results_file, concurrency, mode)
+
+
+def _answer_all(
+    console: Console,
+    questions: List[dict],
+    results_file: IO[str],
+    concurrency: int,
+    mode: Optional[str],
+) -> int:
+    start = time.perf_counter()
+    latencies, failures = [], 0
+    prompt_tokens = completion_tokens = 0
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, concurrency), thread_name_prefix="batch"
+    ) as executor:
+        # Results are written as they come in, in the order of the questions
+        answers = executor.map(lambda item: _answer(item["question"], mode), questions)
+        for index, (item, result) in enumerate(zip(questions, answers)):
+            record = {"index": index, "id": item["id"], "question": item["question"]}
+            record.update(result)
+            results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results_file.flush()
+
+            latencies.append(result["seconds"])
+            failures += not result["success"]
+            prompt_tokens += result["prompt_tokens"]
+            completion_tokens += result["completion_tokens"]
+
+    wall_seconds = time.perf_counter() - start
+    latencies.sort()
+    console.print(
+        f"[dim italic]{len(questions)} questions in {wall_seconds:.1f}s "
+        f"({len(questions) / wall_seconds:.2f}/s), {failures} failed, "
+        f"p50 {_percentile(latencies, 50):.2f}s, p95 {_percentile(latencies, 95):.2f}s, "
+        f"{prompt_tokens} prompt + {completion_tokens} completion tokens[/dim italic]"
+    )
+    return 1 if failures else 0
+
+
+# Answer one question without printing it, as a result record
+def _answer(question: str, mode: Optional[str]) -> dict:
+    start = time.perf_counter()
+    try:
+        result = query_vault(question, stream=False, mode=mode, quiet=True)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    return {
+        "success": result["success"],
+        "answer": result.get("answer"),
+        "error": result["error"],
+        "cached": result.get("cached", False),
+        "seconds": round(time.perf_counter() - start, 3),
+        "llm_calls": result.get("llm_calls", 0),
+        "prompt_tokens": result.get("prompt_tokens", 0),
+        "completion_tokens": result.get("completion_tokens", 0),
+    }
+
+
+# Nearest-rank percentile of sorted values
+def _percentile(ordered: List[float], percent: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(rank)]
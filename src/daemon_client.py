@@ -0,0 +1,185 @@
+# Client of the index daemon (see index_daemon.py)
+# A running daemon announces itself in daemon.json in the data dir: its port, pid,
+# vault and model, and a random access token. The file is only readable by the
+# user, and every request must carry the token, so other local users cannot use
+# the daemon. Only the standard library is imported here, connecting takes
+# milliseconds.
+
+import http.client
+import json
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .env_setup import get_data_dir
+
+# Written by the daemon while it is running
+DAEMON_STATE_FILE = "daemon.json"
+
+# Seconds to wait for a status answer before the daemon is considered gone
+_STATUS_TIMEOUT = 1.0
+
+
+class DaemonError(Exception):
+    pass
+
+
+def daemon_state_path() -> Path:
+    return get_data_dir() / DAEMON_STATE_FILE
+
+
+# Address and token of the last daemon started, None if there is none
+def read_daemon_state() -> Optional[dict]:
+    try:
+        with open(daemon_state_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Answer of the daemon to a question, read as it arrives
+class DaemonQuery:
+
+    def __init__(self, connection: http.client.HTTPConnection, response):
+        self._connection = connection
+        self._response = response
+        self._result: Optional[dict] = None
+        # The first event is read right away, so a query that failed before the
+        # answer started is known before anything is rendered
+        self._pending = self._read_event()
+
+    # True when the query failed before the first token
+    @property
+    def failed(self) -> bool:
+        return self._result is not None and not self._result["success"]
+
+    # Tokens of the answer as the LLM writes them
+    def tokens(self) -> Iterator[str]:
+        while self._pending is not None:
+            event, self._pending = self._pending, None
+            if "token" in event:
+                yield event["token"]
+                self._pending = self._read_event()
+
+    # Query result dict (as VaultRAG.query returns it), after the last token
+    def result(self) -> dict:
+        for _ in self.tokens():
+            pass
+        if self._result is None:
+            raise DaemonError("Index daemon closed the connection before answering")
+        return self._result
+
+    def _read_event(self) -> Optional[dict]:
+        try:
+            line = self._response.readline()
+        except (OSError, http.client.HTTPException) as e:
+            raise DaemonError(f"Lost connection to the index daemon: {e}")
+        if not line:
+            self._connection.close()
+            return None
+        event = json.loads(line)
+        if "result" in event:
+            self._result = event["result"]
+            self._connection.close()
+            return None
+        return event
+
+
+class DaemonClient:
+
+    def __init__(self, port: int, token: str, pid: Optional[int] = None):
+        self.port = port
+        self.token = token
+        self.pid = pid
+
+    # Client of the daemon serving this vault and model, None if none is running
+    @classmethod
+    def find(cls, vault_path: str, llm_model: str) -> Optional["DaemonClient"]:
+        state = read_daemon_state()
+        if state is None:
+            return None
+        if state.get("llm_model") != llm_model or not _same_path(
+            state.get("vault_path", ""), vault_path
+        ):
+            return None
+        client = cls(state["port"], state["token"], state.get("pid"))
+        try:
+            client.status()
+        except DaemonError:
+            return None  # left behind by a daemon that did not shut down cleanly
+        return client
+
+    # Vault, model, pid, uptime and index size of the daemon
+    def status(self) -> dict:
+        return self._request("GET", "/status", timeout=_STATUS_TIMEOUT)
+
+    # Ask a question, with stream=True the answer tokens are sent as they arrive
+    def query(
+        self, question: str, mode: Optional[str] = None, stream: bool = True
+    ) -> DaemonQuery:
+        connection, response = self._open(
+            "POST", "/query", {"question": question, "mode": mode, "stream": stream}
+        )
+        return DaemonQuery(connection, response)
+
+    def find_similar(self, content: str, top_k: int = 3) -> list:
+        body = {"content": content, "top_k": top_k}
+        return self._request("POST", "/similar", body)["files"]
+
+    def search(self, terms: str, top_k: int = 10) -> list:
+        body = {"terms": terms, "top_k": top_k}
+        return self._request("POST", "/search", body)["results"]
+
+    def insert_note(self, file_path: str, markdown: str) -> str:
+        body = {"file_path": file_path, "markdown": markdown}
+        return self._request("POST", "/insert", body)["message"]
+
+    def rebuild(self, force: bool = False) -> str:
+        return self._request("POST", "/rebuild", {"force": force})["message"]
+
+    def shutdown(self) -> str:
+        return self._request("POST", "/shutdown", {})["message"]
+
+    def _request(
+        self, method: str, path: str, body: Optional[dict] = None, timeout=None
+    ) -> dict:
+        connection, response = self._open(method, path, body, timeout)
+        try:
+            return json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise DaemonError(f"Invalid answer from the index daemon: {e}")
+        finally:
+            connection.close()
+
+    def _open(
+        self, method: str, path: str, body: Optional[dict] = None, timeout=None
+    ) -> tuple:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=timeout)
+        headers = {"authorization": f"Bearer {self.token}"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["content-type"] = "application/json"
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise DaemonError(f"Index daemon not reachable: {e}")
+
+        if response.status != 200:
+            message = response.read().decode("utf-8", errors="replace")
+            connection.close()
+            try:
+                message = json.loads(message)["error"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise DaemonError(f"Index daemon answered {response.status}: {message}")
+        return connection, response
+
+
+def _same_path(first: str, second: str) -> bool:
+    try:
+        return os.path.samefile(first, second)
+    except OSError:
+        return Path(first).resolve() == Path(second).resolve()
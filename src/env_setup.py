@@ -46,8 +46,49 @@ def check_and_setup_env():
     return vault_path, api_key, llm_model, user_name
 
 
+def load_env_config():
+    """Load the saved configuration without prompting (for non-interactive runs).
+
+    Variables already set in the environment take precedence over the .env file.
+    Raises RuntimeError when the vault path, API key or model is not configured.
+    """
+    load_dotenv(_get_env_file_path(), override=False)
+
+    vault_path = os.getenv("OBSIDIAN_VAULT_PATH")
+    api_key = os.getenv("API_KEY")
+    llm_model = os.getenv("LLM_MODEL")
+    missing = [
+        name
+        for name, value in [
+            ("OBSIDIAN_VAULT_PATH", vault_path),
+            ("API_KEY", api_key),
+            ("LLM_MODEL", llm_model),
+        ]
+        if not value
+    ]
+    if missing:
+        raise RuntimeError(
+            f"Missing configuration: {', '.join(missing)} "
+            "(run obsidian-ragsody once interactively or set them in the environment)"
+        )
+    return vault_path, api_key, llm_model
+
+
+def get_data_dir() -> Path:
+    """Get the user data directory used for the config and cached indexes.
+
+    RAGSODY_DATA_DIR overrides it (the benchmarks run in a throwaway folder).
+    """
+    override = os.getenv("RAGSODY_DATA_DIR")
+    data_dir = (
+        Path(override)
+        if override
+        else Path(user_data_dir("obsidian_ragsody", "obsidian_ragsody"))
+    )
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
+
+
 def _get_env_file_path():
     """Get the path to the .env file in user data directory."""
-    data_dir = Path(user_data_dir("obsidian_ragsody", "obsidian_ragsody"))
-    data_dir.mkdir(parents=True, exist_ok=True)
-    return data_dir / ".env"
+    return get_data_dir() / ".env"
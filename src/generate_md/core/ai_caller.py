@@ -1,18 +1,235 @@
+# Chat completions over long-lived, pooled OpenAI clients
+# One client per API key is kept for the whole session, so its keep-alive
+# connections are reused by every generation, summary and revision. Requests have
+# a timeout (LLM_TIMEOUT_SECONDS) and are retried on rate limits, timeouts and
+# server errors with exponential backoff and jitter (LLM_MAX_RETRIES). Failures
+# raise AICallError instead of returning the error text as the answer.
+# Async calls run on one private event loop (with one async client per API key),
+# so concurrent requests share a connection pool whichever loop awaits them.
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from typing import Dict, Iterator, List
+
+import httpx
 import openai
 
+from ...background_loop import BackgroundLoop
+from ...instrumentation import record_api_call, span
+from ...openai_retry import backoff, retry_after
+
+# Seconds to wait for a response (or for the next streamed token)
+DEFAULT_LLM_TIMEOUT = 120.0
+
+# Retries after a failed request
+DEFAULT_LLM_MAX_RETRIES = 4
+
+# Seconds to establish a connection
+_CONNECT_TIMEOUT = 10.0
+
+# Connections kept in the pool per client
+_MAX_CONNECTIONS = 16
+
+# Lower temperature for more consistent output
+_TEMPERATURE = 0.3
+
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class AICallError(Exception):
+    pass
+
 
 # Call OpenAI API with a given prompt
 def call_openai_api(prompt: str, api_key: str, llm_model: str) -> str:
+    client = _get_client(api_key)
+    with span("call_openai_api", model=llm_model) as attributes:
+        for attempt in range(_max_retries() + 1):
+            attributes["attempts"] = attempt + 1
+            try:
+                response = client.chat.completions.create(
+                    model=llm_model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=_TEMPERATURE,
+                )
+                _record_usage(response.usage)
+                return (response.choices[0].message.content or "").strip()
+            except Exception as e:
+                delay = _retry_delay(e, attempt)
+            time.sleep(delay)
+
+
+# Same as call_openai_api, for callers running in an event loop
+async def call_openai_api_async(prompt: str, api_key: str, llm_model: str) -> str:
+    with span("call_openai_api", model=llm_model) as attributes:
+        future = _loop.submit(_complete_async(prompt, api_key, llm_model, attributes))
+        response = await asyncio.wrap_future(future)
+        # Recorded here so the call counts towards the caller's spans
+        _record_usage(response.usage)
+        return (response.choices[0].message.content or "").strip()
+
+
+# Call OpenAI API with every prompt, at most `concurrency` requests at a time
+# Answers are in the order of the prompts, the first failure raises AICallError
+def call_openai_api_many(
+    prompts: List[str], api_key: str, llm_model: str, concurrency: int
+) -> List[str]:
+    context = contextvars.copy_context()
+    return _loop.submit(
+        _call_many(prompts, api_key, llm_model, concurrency, context)
+    ).result()
+
+
+async def _call_many(
+    prompts: List[str],
+    api_key: str,
+    llm_model: str,
+    concurrency: int,
+    context: contextvars.Context,
+) -> List[str]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(prompt: str) -> str:
+        async with semaphore:
+            return await call_openai_api_async(prompt, api_key, llm_model)
+
+    # Every call runs in a copy of the caller's context, so it is timed and
+    # counted inside the caller's spans
+    tasks = [
+        asyncio.create_task(call(prompt), context=context.copy()) for prompt in prompts
+    ]
     try:
-        client = openai.OpenAI(api_key=api_key)
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
 
-        response = client.chat.completions.create(
-            model=llm_model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,  # Lower temperature for more consistent output
+# Chat completion with retries, run on the private loop
+async def _complete_async(prompt: str, api_key: str, llm_model: str, attributes: dict):
+    client = _get_async_client(api_key)
+    for attempt in range(_max_retries() + 1):
+        attributes["attempts"] = attempt + 1
+        try:
+            return await client.chat.completions.create(
+                model=llm_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=_TEMPERATURE,
+            )
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+        await asyncio.sleep(delay)
+
+
+# Yield the answer in pieces as they arrive
+# A failed request is retried only until the first piece was received, later
+# failures raise AICallError (the caller already showed part of the answer)
+def stream_openai_api(prompt: str, api_key: str, llm_model: str) -> Iterator[str]:
+    client = _get_client(api_key)
+    with span("call_openai_api", model=llm_model, stream=True) as attributes:
+        for attempt in range(_max_retries() + 1):
+            attributes["attempts"] = attempt + 1
+            received = False
+            try:
+                stream = client.chat.completions.create(
+                    model=llm_model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=_TEMPERATURE,
+                    stream=True,
+                    # The last chunk reports the token usage
+                    stream_options={"include_usage": True},
+                )
+                usage = None
+                with stream:
+                    for chunk in stream:
+                        usage = chunk.usage or usage
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            received = True
+                            yield chunk.choices[0].delta.content
+                _record_usage(usage)
+                return
+            except Exception as e:
+                if received:
+                    raise AICallError(
+                        f"Error generating content: {_describe(e)}"
+                    ) from e
+                delay = _retry_delay(e, attempt)
+            time.sleep(delay)
+
+
+# Clients shared by all calls of the session, per API key
+_clients: Dict[str, openai.OpenAI] = {}
+_clients_lock = threading.Lock()
+
+# Async clients only ever run on this loop, so their connection pools are reused
+_loop = BackgroundLoop()
+_async_clients: Dict[str, openai.AsyncOpenAI] = {}
+
+
+def _get_client(api_key: str) -> openai.OpenAI:
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = openai.OpenAI(
+                api_key=api_key,
+                # Retries are handled here, with the configured count and jitter
+                max_retries=0,
+                timeout=_timeout(),
+                http_client=httpx.Client(limits=_limits(), timeout=_timeout()),
+            )
+        return _clients[api_key]
+
+
+# Only called on the private loop, which runs on a single thread
+def _get_async_client(api_key: str) -> openai.AsyncOpenAI:
+    if api_key not in _async_clients:
+        _async_clients[api_key] = openai.AsyncOpenAI(
+            api_key=api_key,
+            max_retries=0,
+            timeout=_timeout(),
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout()),
         )
+    return _async_clients[api_key]
+
+
+def _timeout() -> httpx.Timeout:
+    seconds = float(os.getenv("LLM_TIMEOUT_SECONDS", str(DEFAULT_LLM_TIMEOUT)))
+    return httpx.Timeout(seconds, connect=min(seconds, _CONNECT_TIMEOUT))
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_MAX_CONNECTIONS, max_keepalive_connections=_MAX_CONNECTIONS
+    )
+
+
+def _max_retries() -> int:
+    return max(0, int(os.getenv("LLM_MAX_RETRIES", str(DEFAULT_LLM_MAX_RETRIES))))
+
+
+# Seconds to wait before the next attempt, AICallError if the error is final
+def _retry_delay(error: Exception, attempt: int) -> float:
+    if not isinstance(error, _RETRYABLE_ERRORS) or attempt >= _max_retries():
+        raise AICallError(f"Error generating content: {_describe(error)}") from error
+    if isinstance(error, openai.RateLimitError):
+        return retry_after(error) or backoff(attempt)
+    return backoff(attempt)
+
+
+# Count the call and its tokens for the session stats
+def _record_usage(usage) -> None:
+    if usage is None:
+        record_api_call("llm")
+    else:
+        record_api_call("llm", usage.prompt_tokens, usage.completion_tokens)
 
-        return response.choices[0].message.content.strip()
 
-    except Exception as e:
-        return f"Error generating content: {str(e)}"
+def _describe(error: Exception) -> str:
+    return str(error) or type(error).__name__
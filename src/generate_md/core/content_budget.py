@@ -0,0 +1,108 @@
+# Token budgeting for scraped page content before it is sent to the LLM
+# Boilerplate sentences (cookie banners, share buttons, copyright lines, ...) are
+# removed and sentences repeated across sources are kept only once. Content that
+# still exceeds the budget is split into token-bounded parts for map-reduce
+# summarization.
+
+import re
+from typing import List
+
+from llama_index.core.utils import get_tokenizer
+
+# Default number of source tokens sent in the note generation prompt
+DEFAULT_SOURCE_TOKEN_BUDGET = 12000
+
+# Sentences matching any of these are site chrome, not content
+_BOILERPLATE_PATTERNS = re.compile(
+    r"|".join(
+        [
+            r"\bwe use cookies\b",
+            r"\bthis (web)?site uses cookies\b",
+            r"\b(accept|allow|manage|reject) (all )?cookies\b",
+            r"\bcookie (policy|settings|preferences|consent)\b",
+            r"\ball rights reserved\b",
+            r"^(©|\(c\)|copyright)\b",
+            r"\bsubscribe to (our|the) newsletter\b",
+            r"\bsign (up|in) (for|to)\b.*\b(newsletter|account|free)\b",
+            r"^(share|tweet|pin it|print|email)( (this|on \w+))?$",
+            r"\b(skip to (main )?content|back to top)\b",
+            r"\b(privacy policy|terms of (use|service))\b.*\b(privacy policy|terms of (use|service)|contact)\b",
+            r"^(advertisement|sponsored)$",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])|\n+")
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer()(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [
+        sentence.strip()
+        for sentence in _SENTENCE_SPLIT_RE.split(text)
+        if sentence.strip()
+    ]
+
+
+# Remove boilerplate and sentences already seen in an earlier source
+# (sources are the scraped {"url", "content"} dicts, returned in the same shape)
+def clean_sources(all_content: List[dict]) -> List[dict]:
+    seen = set()
+    cleaned = []
+
+    for item in all_content:
+        kept = []
+        for sentence in split_sentences(item["content"]):
+            key = " ".join(sentence.lower().split())
+            if _BOILERPLATE_PATTERNS.search(sentence):
+                continue
+            # Short sentences ("Read more.", "Home") repeat legitimately
+            if len(key) > 30:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(sentence)
+        cleaned.append({"url": item["url"], "content": " ".join(kept)})
+
+    return cleaned
+
+
+# Split text into consecutive parts of at most max_tokens, on sentence boundaries
+def split_into_token_parts(text: str, max_tokens: int) -> List[str]:
+    tokenizer = get_tokenizer()
+    parts = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for sentence in _bounded_sentences(text, max_tokens, tokenizer):
+        tokens = len(tokenizer(sentence))
+        if current and current_tokens + tokens > max_tokens:
+            parts.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+# Sentences of the text, with run-on "sentences" (tables, lists without
+# punctuation) cut into word windows that fit max_tokens
+def _bounded_sentences(text: str, max_tokens: int, tokenizer) -> List[str]:
+    sentences = []
+    for sentence in split_sentences(text):
+        if len(tokenizer(sentence)) <= max_tokens:
+            sentences.append(sentence)
+            continue
+        words = sentence.split()
+        # Words are ~1.3 tokens on average, leave some headroom
+        window = max(1, int(max_tokens * 0.6))
+        sentences.extend(
+            " ".join(words[i : i + window]) for i in range(0, len(words), window)
+        )
+    return sentences
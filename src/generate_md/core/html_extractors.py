@@ -0,0 +1,150 @@
+# HTML text extraction backends for scraped pages
+# - "bs4":        BeautifulSoup with the pure-Python html.parser (always available)
+# - "selectolax": lexbor C parser (needs selectolax), several times faster and
+#                 lighter on memory; the main content region is found with one
+#                 query for all selectors instead of one query per selector
+# Both return "Title: <title>\n\n<main text>" with whitespace collapsed the same way.
+
+import os
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional (pip install obsidian-ragsody[fast])
+    LexborHTMLParser = None
+
+HTML_BACKENDS = ["bs4", "selectolax"]
+
+# Elements that never contain the main text
+_BOILERPLATE_TAGS = ["script", "style", "nav", "header", "footer", "aside"]
+
+# Common selectors for main content, best first
+_CONTENT_SELECTORS = [
+    "main",
+    "article",
+    '[role="main"]',
+    ".content",
+    ".post-content",
+    ".entry-content",
+    ".article-content",
+    "#content",
+    "#main-content",
+]
+
+
+# Pick the extraction backend (HTML_PARSER: auto, bs4 or selectolax)
+def select_html_backend(preferred: Optional[str] = None) -> str:
+    preferred = (preferred or os.getenv("HTML_PARSER", "auto")).lower()
+    if preferred not in HTML_BACKENDS + ["auto"]:
+        raise ValueError(
+            f"Unknown HTML parser '{preferred}', use one of: auto, "
+            + ", ".join(HTML_BACKENDS)
+        )
+    if preferred == "selectolax" and LexborHTMLParser is None:
+        raise ValueError(
+            "HTML parser 'selectolax' needs selectolax (pip install selectolax)"
+        )
+    if preferred != "auto":
+        return preferred
+    return "selectolax" if LexborHTMLParser is not None else "bs4"
+
+
+# Extract title and main text from raw HTML with the given backend
+def extract_text(html: bytes, backend: str) -> str:
+    if backend == "selectolax":
+        title, text = _extract_with_selectolax(html)
+    else:
+        title, text = _extract_with_bs4(html)
+    return f"Title: {title}\n\n{_clean_text(text)}".strip()
+
+
+# Collapse the whitespace of extracted text into single spaces
+def _clean_text(text: str) -> str:
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return " ".join(chunk for chunk in chunks if chunk)
+
+
+def _extract_with_bs4(html: bytes) -> tuple[str, str]:
+    soup = BeautifulSoup(html, "html.parser")
+
+    title_tag = soup.find("title")
+    title = title_tag.get_text().strip() if title_tag else "No title found"
+
+    # Remove script and style elements
+    for element in soup(_BOILERPLATE_TAGS):
+        element.decompose()
+
+    # Try to find main content areas first, fall back to the whole page
+    main_content = None
+    for selector in _CONTENT_SELECTORS:
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+
+    return title, (main_content or soup).get_text()
+
+
+def _extract_with_selectolax(html: bytes) -> tuple[str, str]:
+    tree = LexborHTMLParser(html)
+
+    title_tag = tree.css_first("title")
+    title = title_tag.text().strip() if title_tag else "No title found"
+
+    # Removed in native code, in one pass over the tree
+    tree.strip_tags(_BOILERPLATE_TAGS)
+
+    main_content = _find_main_content_area(tree.root)
+    root = main_content or tree.root
+    return title, root.text(deep=True, separator="") if root else ""
+
+
+# One native query for all content selectors (matches come back in document
+# order), then keep the match of the best selector: the same element that
+# querying the selectors one after another would find
+def _find_main_content_area(root):
+    if root is None:
+        return None
+
+    best, best_rank = None, len(_CONTENT_SELECTORS)
+    for node in root.css(", ".join(_CONTENT_SELECTORS)):
+        rank = _content_rank(node)
+        if rank < best_rank:
+            best, best_rank = node, rank
+            if rank == 0:
+                break
+    return best
+
+
+# Position of the first content selector the element matches (len if none)
+def _content_rank(node) -> int:
+    tag = node.tag
+    if tag == "main":
+        return 0
+    if tag == "article":
+        return 1
+
+    attributes = node.attributes
+    if not attributes:
+        return len(_CONTENT_SELECTORS)
+    if attributes.get("role") == "main":
+        return 2
+
+    classes = (attributes.get("class") or "").split()
+    for rank, name in (
+        (3, "content"),
+        (4, "post-content"),
+        (5, "entry-content"),
+        (6, "article-content"),
+    ):
+        if name in classes:
+            return rank
+
+    element_id = attributes.get("id")
+    if element_id == "content":
+        return 7
+    if element_id == "main-content":
+        return 8
+    return len(_CONTENT_SELECTORS)
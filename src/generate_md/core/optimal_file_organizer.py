@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import List
-from ...vault_rag.vault_rag import find_similar_files
+from ...instrumentation import traced
+from ...vault_access import find_similar_files
 
 
 # Find the optimal folder for the new markdown file using RAG similarity
@@ -24,6 +25,7 @@ def find_optimal_folder(markdown_content: str, vault_path: str) -> str:
 
 
 # Save markdown content to a specific folder
+@traced("save_note")
 def save_markdown_to_folder(markdown_content: str, folder_path: str) -> str:
     folder = Path(folder_path)
     filename = _generate_filename_from_title(markdown_content)
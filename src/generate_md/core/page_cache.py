@@ -0,0 +1,161 @@
+# Persistent cache of scraped pages: raw responses and their extracted text
+# A cached page is reused without any request while it is fresh (Cache-Control
+# max-age, or a few minutes for pages without one). After that it is revalidated
+# with a conditional GET (ETag / Last-Modified), so an unchanged page costs one
+# 304 round-trip and is not parsed again. The cache is size-bounded (LRU eviction).
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from ...sqlite_store import SQLiteStore, trim_lru
+
+# Default size limit of the cached pages and texts
+DEFAULT_MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+# Seconds a page without Cache-Control max-age is reused without revalidation
+DEFAULT_FRESH_SECONDS = 300
+
+
+@dataclass
+class CachedPage:
+    url: str
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+    # Headers turning the next request for this page into a conditional GET
+    def validation_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+# Seconds a response may be reused without revalidation, None if it must not be stored
+def freshness_lifetime(headers: Dict[str, str]) -> Optional[float]:
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name] = value
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        return float(directives["max-age"])
+    except (KeyError, ValueError):
+        return float(DEFAULT_FRESH_SECONDS)
+
+
+class PageCache(SQLiteStore):
+
+    # Open (or create) the cache database
+    def __init__(self, db_path: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        super().__init__(
+            db_path,
+            [
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fresh_until REAL NOT NULL,
+                    text TEXT,
+                    text_backend TEXT,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_pages_last_used ON pages (last_used)",
+            ],
+        )
+        self.max_bytes = max_bytes
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, etag, last_modified, fresh_until FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE pages SET last_used = ? WHERE url = ?", (time.time(), url)
+            )
+            self._conn.commit()
+        return CachedPage(url, row[0], row[1], row[2], row[3])
+
+    # Store a fresh 200 response (its extracted text is dropped until re-extracted)
+    def put(self, url: str, content: bytes, headers: Dict[str, str]) -> None:
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            self.delete(url)
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, NULL, NULL, ?, ?)",
+                (
+                    url,
+                    content,
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    now + lifetime,
+                    len(content),
+                    now,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    # A 304 confirmed the cached page, it is fresh again for the new lifetime
+    def mark_revalidated(self, url: str, headers: Dict[str, str]) -> None:
+        lifetime = freshness_lifetime(headers) or 0.0
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fresh_until = ?, etag = COALESCE(?, etag) WHERE url = ?",
+                (time.time() + lifetime, headers.get("etag"), url),
+            )
+            self._conn.commit()
+
+    # Extracted text of the cached page, if it was extracted with the same backend
+    def get_text(self, url: str, backend: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM pages WHERE url = ? AND text_backend = ?",
+                (url, backend),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_text(self, url: str, backend: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET text = ?, text_backend = ?, "
+                "size = LENGTH(content) + ? WHERE url = ?",
+                (text, backend, len(text.encode("utf-8")), url),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()[0]
+        trim_lru(self._conn, "pages", "url", "size", total, self.max_bytes)
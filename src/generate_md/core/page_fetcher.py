@@ -0,0 +1,156 @@
+# Concurrent page downloads over one long-lived, pooled HTTP client
+# All URLs of a request are fetched at once, with at most a few connections per host
+# (keep-alive connections are reused across requests and later calls). A global
+# deadline bounds the whole batch: pages that are not done by then are reported as
+# failed and everything that did arrive is returned.
+# With a PageCache, fresh pages are served without a request and stale ones are
+# revalidated with a conditional GET.
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ...background_loop import BackgroundLoop
+from ...env_setup import get_data_dir
+from .page_cache import PageCache
+
+# Sent with every request to avoid being blocked
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Seconds until all pages of a batch must be downloaded
+DEFAULT_DEADLINE = 20.0
+
+# Seconds per request (connect, read, write, pool)
+DEFAULT_TIMEOUT = 10.0
+
+# Requests in flight per host
+DEFAULT_PER_HOST_LIMIT = 4
+
+# Connections kept in the pool overall
+_MAX_CONNECTIONS = 32
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int] = None
+    content: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    # "fresh" (served from the cache) or "revalidated" (304), None if downloaded
+    cache_status: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class PageFetcher:
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+        cache: Optional[PageCache] = None,
+    ):
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.cache = cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # The client lives on one private event loop, so its connection pool is
+        # reused by every call, whichever thread it comes from
+        self._loop = BackgroundLoop()
+
+    # Download all URLs concurrently, results are in the order of the URLs
+    def fetch_all(
+        self, urls: List[str], deadline: float = DEFAULT_DEADLINE
+    ) -> List[FetchResult]:
+        return self._loop.submit(self._fetch_all(urls, deadline)).result()
+
+    async def _fetch_all(self, urls: List[str], deadline: float) -> List[FetchResult]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=_MAX_CONNECTIONS,
+                    max_keepalive_connections=_MAX_CONNECTIONS,
+                ),
+            )
+
+        tasks = [asyncio.ensure_future(self._fetch(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        # Slow sites do not hold back the pages that already arrived
+        for task in pending:
+            task.cancel()
+
+        results = []
+        for url, task in zip(urls, tasks):
+            if task in done:
+                results.append(task.result())
+            else:
+                results.append(
+                    FetchResult(url=url, error=f"no response within {deadline:g}s")
+                )
+        return results
+
+    async def _fetch(self, url: str) -> FetchResult:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+
+        try:
+            cached = self.cache.get(url) if self.cache is not None else None
+            if cached is not None and cached.is_fresh:
+                return FetchResult(
+                    url=url, status=200, content=cached.content, cache_status="fresh"
+                )
+
+            request_headers = cached.validation_headers() if cached else {}
+            async with self._host_limits[host]:
+                response = await self._client.get(url, headers=request_headers)
+
+            # Unchanged since it was cached
+            if response.status_code == 304 and cached is not None:
+                self.cache.mark_revalidated(url, dict(response.headers))
+                return FetchResult(
+                    url=url,
+                    status=304,
+                    content=cached.content,
+                    headers=dict(response.headers),
+                    cache_status="revalidated",
+                )
+
+            response.raise_for_status()
+            if self.cache is not None:
+                self.cache.put(url, response.content, dict(response.headers))
+            return FetchResult(
+                url=url,
+                status=response.status_code,
+                content=response.content,
+                headers=dict(response.headers),
+            )
+        except Exception as e:
+            return FetchResult(url=url, error=str(e) or type(e).__name__)
+
+
+# Fetcher shared by all scrapes of the session
+_page_fetcher: Optional[PageFetcher] = None
+_page_fetcher_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    global _page_fetcher
+    with _page_fetcher_lock:
+        if _page_fetcher is None:
+            _page_fetcher = PageFetcher(
+                cache=PageCache(get_data_dir() / "page_cache.sqlite3")
+            )
+        return _page_fetcher
@@ -1,19 +1,32 @@
+import os
 from typing import List
-from .ai_caller import call_openai_api
+from rich.console import Console
+from ...instrumentation import span
+from .ai_caller import call_openai_api, call_openai_api_many
+from .content_budget import (
+    DEFAULT_SOURCE_TOKEN_BUDGET,
+    clean_sources,
+    count_tokens,
+    split_into_token_parts,
+)
+
+# Summaries requested concurrently when content exceeds the budget
+_MAP_CONCURRENCY = 4
 
 
 # Generate markdown content from scraped URLs using OpenAI
 def generate_markdown_from_content(
     all_content: List[dict], prompt: str, api_key: str, llm_model: str
 ) -> str:
-    # Prepare the content for the AI prompt
-    content_text = _prepare_content_for_ai(all_content)
+    with span("generate_markdown", sources=len(all_content)):
+        # Prepare the content for the AI prompt
+        content_text = _prepare_content_for_ai(all_content, prompt, api_key, llm_model)
 
-    # Create the AI prompt
-    ai_prompt = _create_ai_prompt(content_text, prompt)
+        # Create the AI prompt
+        ai_prompt = _create_ai_prompt(content_text, prompt)
 
-    # Call OpenAI to generate markdown
-    response = call_openai_api(ai_prompt, api_key, llm_model)
+        # Call OpenAI to generate markdown
+        response = call_openai_api(ai_prompt, api_key, llm_model)
 
     # Clean the response to extract only markdown content
     cleaned_response = _extract_markdown_content(response)
@@ -21,11 +34,53 @@ def generate_markdown_from_content(
     return cleaned_response
 
 
-# Prepare scraped content for AI processing
-def _prepare_content_for_ai(all_content: List[dict]) -> str:
+# Prepare scraped content for AI processing, within the content token budget
+# (SOURCE_TOKEN_BUDGET). Boilerplate and repeated sentences are dropped first; if
+# the sources are still too long they are summarized in parallel (map) and the
+# note is generated from the summaries (reduce).
+def _prepare_content_for_ai(
+    all_content: List[dict], prompt: str, api_key: str, llm_model: str
+) -> str:
+    budget = int(os.getenv("SOURCE_TOKEN_BUDGET", str(DEFAULT_SOURCE_TOKEN_BUDGET)))
+    sources = clean_sources(all_content)
+
+    content_text = _join_sources(sources)
+    total_tokens = count_tokens(content_text)
+    if total_tokens <= budget:
+        return content_text
+
+    # Map: summarize every part of every source, all requests concurrently
+    parts = [
+        (i, part)
+        for i, item in enumerate(sources)
+        for part in split_into_token_parts(item["content"], budget)
+    ]
+    Console().print(
+        f"[dim italic]Sources have {total_tokens} tokens (budget {budget}), "
+        f"summarizing {len(parts)} parts first...[/dim italic]"
+    )
+    # Each summary gets an equal share of the budget
+    summary_tokens = max(200, budget // len(parts))
+    with span("summarize_sources", parts=len(parts)):
+        summaries = call_openai_api_many(
+            [_create_summary_prompt(part, prompt, summary_tokens) for _, part in parts],
+            api_key,
+            llm_model,
+            _MAP_CONCURRENCY,
+        )
+
+    # Reduce: the note is generated from the summaries, grouped by source
+    summarized = [{"url": item["url"], "content": ""} for item in sources]
+    for (i, _), summary in zip(parts, summaries):
+        summarized[i]["content"] += summary.strip() + "\n"
+    return _join_sources(summarized)
+
+
+# Format sources as numbered sections
+def _join_sources(sources: List[dict]) -> str:
     prepared_content = []
 
-    for i, item in enumerate(all_content, 1):
+    for i, item in enumerate(sources, 1):
         url = item["url"]
         content = item["content"]
 
@@ -35,6 +90,13 @@ def _prepare_content_for_ai(all_content: List[dict]) -> str:
     return "\n".join(prepared_content)
 
 
+# Create the prompt summarizing one part of a source for the user's request
+def _create_summary_prompt(content: str, user_prompt: str, max_tokens: int) -> str:
+    return f"""The following is part of a web page that will be turned into a note for this request: "{user_prompt}"
+    Summarize everything in it that is relevant to the request in at most {max_tokens} tokens. Keep facts, numbers, names, code and links. Return only the summary.
+    {content}"""
+
+
 # Create the prompt for OpenAI
 def _create_ai_prompt(content_text: str, user_prompt: str) -> str:
     system_prompt = f"""I have fetched content from the given URLs. The content can be found below.
@@ -1,86 +1,46 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional
+from typing import List
+from ...instrumentation import span
+from .html_extractors import extract_text, select_html_backend
+from .page_fetcher import DEFAULT_DEADLINE, FetchResult, get_page_fetcher
 
 
 # Scrape and extract clean text content from a URL
 def scrape_url(url: str) -> str:
-    try:
-        # Send GET request with headers to avoid blocking
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()  # Raise exception for bad status codes
+    return scrape_urls([url])[0]
 
-        # Parse HTML content
-        soup = BeautifulSoup(response.content, "html.parser")
 
-        # Extract title
-        title = _extract_title(soup)
+# Scrape several URLs concurrently, returns the text of each page in URL order
+# (pages that fail or miss the deadline get an error message instead)
+def scrape_urls(urls: List[str], deadline: float = DEFAULT_DEADLINE) -> List[str]:
+    with span("scrape_urls", urls=len(urls)) as attributes:
+        with span("scrape_urls.fetch"):
+            results = get_page_fetcher().fetch_all(urls, deadline)
+        attributes["failed"] = sum(not result.ok for result in results)
+        attributes["cached"] = sum(
+            result.cache_status is not None for result in results
+        )
+        with span("scrape_urls.extract"):
+            return [_page_text(result) for result in results]
 
-        # Extract main content
-        content = _extract_main_content(soup)
 
-        # Combine title and content
-        full_content = f"Title: {title}\n\n{content}"
-
-        return full_content.strip()
+# Turn a downloaded page into "Title: ..." followed by its main text
+def _page_text(result: FetchResult) -> str:
+    if not result.ok:
+        return f"Error scraping {result.url}: {result.error}"
 
+    try:
+        backend = select_html_backend()
+
+        # A cached page that is still current was already extracted
+        cache = get_page_fetcher().cache
+        if result.cache_status is not None and cache is not None:
+            text = cache.get_text(result.url, backend)
+            if text is not None:
+                return text
+
+        text = extract_text(result.content, backend)
+        if cache is not None:
+            cache.put_text(result.url, backend, text)
+        return text
     except Exception as e:
-        return f"Error scraping {url}: {str(e)}"
-
-
-# Extract page title
-def _extract_title(soup: BeautifulSoup) -> str:
-    title_tag = soup.find("title")
-    if title_tag:
-        return title_tag.get_text().strip()
-    return "No title found"
-
-
-# Extract main content from the page
-def _extract_main_content(soup: BeautifulSoup) -> str:
-    # Remove script and style elements
-    for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-        script.decompose()
-
-    # Try to find main content areas first
-    main_content = _find_main_content_area(soup)
-
-    if main_content:
-        text = main_content.get_text()
-    else:
-        # Fallback to body text
-        text = soup.get_text()
-
-    # Clean up the text
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = " ".join(chunk for chunk in chunks if chunk)
-
-    return text
-
-
-# Try to find the main content area of the page
-def _find_main_content_area(soup: BeautifulSoup) -> Optional[BeautifulSoup]:
-    # Common selectors for main content
-    content_selectors = [
-        "main",
-        "article",
-        '[role="main"]',
-        ".content",
-        ".post-content",
-        ".entry-content",
-        ".article-content",
-        "#content",
-        "#main-content",
-    ]
-
-    for selector in content_selectors:
-        element = soup.select_one(selector)
-        if element:
-            return element
-
-    return None
+        return f"Error scraping {result.url}: {str(e)}"
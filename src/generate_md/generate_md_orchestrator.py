@@ -1,28 +1,30 @@
+import time
 from rich.console import Console
 from rich.markdown import Markdown
 from typing import List
 from pathlib import Path
 from prompt_toolkit import prompt
-from .core.website_scraper import scrape_url
+from .core.website_scraper import scrape_urls
 from .core.page_generator import (
     generate_markdown_from_content,
     _extract_markdown_content,
 )
 from .core.optimal_file_organizer import find_optimal_folder, save_markdown_to_folder
-from .core.ai_caller import call_openai_api
+from .core.ai_caller import AICallError, stream_openai_api
+from ..vault_rag.answer_rendering import stream_markdown
 
 
 # Main function to process URLs and create markdown files in the vault
 def generate_markdown_from_urls(
     urls: List[str], prompt: str, vault_path: str, api_key: str, llm_model: str
-) -> str:
+) -> dict:
 
     try:
-        # Step 1: Scrape content from all URLs
-        all_content = []
-        for url in urls:
-            content = scrape_url(url)
-            all_content.append({"url": url, "content": content})
+        # Step 1: Scrape content from all URLs (concurrently, within a deadline)
+        all_content = [
+            {"url": url, "content": content}
+            for url, content in zip(urls, scrape_urls(urls))
+        ]
 
         # Step 2: Generate combined markdown summary using AI
         markdown_file = generate_markdown_from_content(
@@ -53,6 +55,8 @@ def generate_markdown_from_urls(
         return {
             "success": True,
             "error": None,
+            "file_path": file_path,
+            "markdown": final_markdown,
         }
 
     except Exception as e:
@@ -65,13 +69,17 @@ def _get_user_approval_for_markdown(
 ) -> str:
     console = Console()
     current_markdown = markdown_content
+    # A streamed revision is already on screen
+    shown = False
 
     while True:
         # Show the current markdown to the user
-        console.print("\n[dim italic]Generated markdown:[/dim italic]\n")
-        markdown_display = Markdown(current_markdown)
-        console.print(markdown_display)
+        if not shown:
+            console.print("\n[dim italic]Generated markdown:[/dim italic]\n")
+            markdown_display = Markdown(current_markdown)
+            console.print(markdown_display)
         console.print("\n[dim]------[/dim]\n")
+        shown = False
 
         # Ask for user approval
         user_input = (
@@ -99,11 +107,31 @@ def _get_user_approval_for_markdown(
         The following is the markdown you created, please adjust, very important, the user still needs this back in markdown, so create a new markdown document:
         {current_markdown}"""
 
-        # Get revised markdown from AI
-        revised_response = call_openai_api(revision_prompt, api_key, llm_model)
+        # Get revised markdown from AI, shown while it is written (and extracted
+        # from the response using the existing function once complete)
+        try:
+            current_markdown, _ = stream_markdown(
+                console,
+                stream_openai_api(revision_prompt, api_key, llm_model),
+                time.perf_counter(),
+                preview=_strip_open_code_fence,
+                finish=_extract_markdown_content,
+                stage="revise_note.render",
+            )
+        except AICallError as e:
+            # Keep the previous version, the user can try again
+            console.print(f"\n[red]{e}[/red]")
+            continue
+
+        shown = True
+
 
-        # Extract markdown content using existing function
-        current_markdown = _extract_markdown_content(revised_response)
+# Hide the ```markdown fence the model may wrap a partial answer in
+def _strip_open_code_fence(text: str) -> str:
+    stripped = text.lstrip()
+    if stripped.startswith("```"):
+        stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+    return stripped
 
 
 # Get user approval for folder location
@@ -0,0 +1,297 @@
+# Long-lived index daemon
+# Loads the vault index once and keeps it warm, so later CLI sessions and batch
+# runs connect in milliseconds instead of loading it again, and share one copy of
+# it in memory. It serves JSON over HTTP on localhost:
+#   GET  /status                          vault, model, pid, uptime, notes
+#   POST /query    {question, mode, stream}  answer as JSON lines: {"token"}... {"result"}
+#   POST /similar  {content, top_k}       {"files"}
+#   POST /search   {terms, top_k}         {"results"}
+#   POST /insert   {file_path, markdown}  {"message"} (file_path is absolute)
+#   POST /rebuild  {force}                {"message"}
+#   POST /shutdown                        {"message"}
+# Requests are handled concurrently, the RAG system serializes index updates
+# against queries itself. The address and access token are written to daemon.json
+# in the data dir (see daemon_client.py), which is removed again on shutdown.
+
+import json
+import os
+import secrets
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from rich.console import Console
+
+from .daemon_client import (
+    DaemonClient,
+    DaemonError,
+    daemon_state_path,
+    read_daemon_state,
+)
+from .env_setup import load_env_config
+
+
+class IndexDaemon:
+
+    def __init__(self, vault_path: str, llm_model: str, watch_mode: Optional[str]):
+        self.vault_path = vault_path
+        self.llm_model = llm_model
+        self.watch_mode = watch_mode
+        self.started = time.time()
+        self.token = secrets.token_urlsafe(32)
+        # RAGSODY_DAEMON_PORT pins the port, by default any free one is used
+        port = int(os.getenv("RAGSODY_DAEMON_PORT", "0"))
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self.server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def status(self) -> dict:
+        from .vault_rag.vault_rag import get_vault_rag
+
+        rag = get_vault_rag()
+        return {
+            "pid": os.getpid(),
+            "vault_path": self.vault_path,
+            "llm_model": self.llm_model,
+            "watch": self.watch_mode,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "notes": len(rag.manifest) if rag is not None else 0,
+        }
+
+    # Announce the daemon to clients, readable by the current user only
+    def write_state(self) -> None:
+        state = {
+            "pid": os.getpid(),
+            "port": self.port,
+            "token": self.token,
+            "vault_path": self.vault_path,
+            "llm_model": self.llm_model,
+        }
+        path = daemon_state_path()
+        temp_path = path.with_suffix(".tmp")
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+    # Remove the state file, unless another daemon has taken it over since
+    def remove_state(self) -> None:
+        state = read_daemon_state()
+        if state is not None and state.get("pid") == os.getpid():
+            daemon_state_path().unlink(missing_ok=True)
+
+    # Stop serving (from any thread but the one running serve_forever)
+    def stop(self) -> None:
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+def _make_handler(daemon: IndexDaemon):
+
+    class Handler(BaseHTTPRequestHandler):
+        # The end of a streamed answer is marked by closing the connection
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path == "/status":
+                self._send_json(200, daemon.status())
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            try:
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "Request body is not JSON"})
+                return
+
+            from .vault_rag import vault_rag
+
+            try:
+                match self.path:
+                    case "/query":
+                        self._query(body)
+                    case "/similar":
+                        files = vault_rag.find_similar_files(
+                            body["content"], body.get("top_k", 3)
+                        )
+                        self._send_json(200, {"files": files})
+                    case "/search":
+                        results = vault_rag.search_vault(
+                            body["terms"], body.get("top_k", 10)
+                        )
+                        self._send_json(200, {"results": results})
+                    case "/insert":
+                        # A relative path would resolve against the daemon's
+                        # working directory, not the client's
+                        if not os.path.isabs(body["file_path"]):
+                            self._send_json(
+                                400, {"error": "file_path must be an absolute path"}
+                            )
+                            return
+                        message = vault_rag.insert_vault_note(
+                            body["file_path"], body["markdown"]
+                        )
+                        self._send_json(200, {"message": message})
+                    case "/rebuild":
+                        message = vault_rag.rebuild_vault_index(
+                            force=body.get("force", False)
+                        )
+                        self._send_json(200, {"message": message})
+                    case "/shutdown":
+                        self._send_json(200, {"message": "Index daemon stopped"})
+                        daemon.stop()
+                    case _:
+                        self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            except KeyError as e:
+                self._send_json(400, {"error": f"Missing field {e}"})
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client went away
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        # Answer a question as JSON lines: every token as it arrives, then the result
+        def _query(self, body: dict) -> None:
+            from .vault_rag.vault_rag import query_vault
+
+            question = body["question"]
+            self.send_response(200)
+            self.send_header("content-type", "application/x-ndjson")
+            self.end_headers()
+            stream = body.get("stream", True)
+            result = query_vault(
+                question,
+                stream=stream,
+                mode=body.get("mode"),
+                quiet=True,
+                on_token=(
+                    (lambda token: self._send_line({"token": token}))
+                    if stream
+                    else None
+                ),
+            )
+            self._send_line({"result": result})
+
+        def _authorized(self) -> bool:
+            expected = f"Bearer {daemon.token}"
+            if secrets.compare_digest(self.headers.get("authorization", ""), expected):
+                return True
+            self._send_json(403, {"error": "Invalid daemon token"})
+            return False
+
+        def _send_line(self, event: dict) -> None:
+            self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+        def _send_json(self, status: int, content: dict) -> None:
+            payload = json.dumps(content).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+# Run the daemon in the foreground until it is stopped (Ctrl-C, SIGTERM or
+# `obsidian-ragsody daemon --stop`), returns the exit code
+def run_daemon(watch: bool = False) -> int:
+    console = Console()
+    try:
+        vault_path, api_key, llm_model = load_env_config()
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        return 2
+
+    running = DaemonClient.find(vault_path, llm_model)
+    if running is not None:
+        console.print(
+            f"[red]An index daemon is already running (pid {running.pid})[/red]"
+        )
+        return 1
+
+    from .vault_rag.vault_rag import (
+        initialize_rag,
+        start_vault_watcher,
+        stop_vault_watcher,
+    )
+
+    try:
+        initialize_rag(vault_path, api_key, llm_model)
+    except Exception as e:
+        console.print(f"[red]RAG system could not be initialized: {e}[/red]")
+        return 2
+    watch_mode = start_vault_watcher() if watch else None
+
+    daemon = IndexDaemon(vault_path, llm_model, watch_mode)
+    daemon.write_state()
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    console.print(
+        f"[dim italic]Index daemon serving {vault_path} on 127.0.0.1:{daemon.port} "
+        f"(pid {os.getpid()}{f', watching vault ({watch_mode})' if watch_mode else ''})"
+        "[/dim italic]"
+    )
+
+    try:
+        daemon.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.remove_state()
+        daemon.server.server_close()
+        if watch_mode:
+            stop_vault_watcher()
+    console.print("[dim italic]Index daemon stopped[/dim italic]")
+    return 0
+
+
+# Stop the daemon of the configured vault, returns the exit code
+def stop_daemon() -> int:
+    console = Console()
+    state = read_daemon_state()
+    if state is None:
+        console.print("[dim italic]No index daemon is running[/dim italic]")
+        return 1
+    client = DaemonClient(state["port"], state["token"], state.get("pid"))
+    try:
+        console.print(f"[dim italic]{client.shutdown()}[/dim italic]")
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        return 1
+    return 0
+
+
+# Print what the running daemon serves, returns the exit code
+def print_daemon_status() -> int:
+    console = Console()
+    state = read_daemon_state()
+    if state is None:
+        console.print("[dim italic]No index daemon is running[/dim italic]")
+        return 1
+    client = DaemonClient(state["port"], state["token"], state.get("pid"))
+    try:
+        status = client.status()
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        return 1
+    console.print(
+        f"Index daemon pid {status['pid']} on 127.0.0.1:{state['port']}, "
+        f"up {status['uptime_seconds'] / 60:.0f} min\n"
+        f"- vault: {status['vault_path']} ({status['notes']} notes)\n"
+        f"- model: {status['llm_model']}\n"
+        f"- watching: {status['watch'] or 'no'}"
+    )
+    return 0
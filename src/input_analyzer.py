@@ -1,9 +1,15 @@
 import os
+import time
 from pathlib import Path
 from enum import Enum
 from rich.console import Console
 from rich.markdown import Markdown
+from rich.table import Table
 from dotenv import load_dotenv
+from .instrumentation import session_stats
+
+# Explicit prefix, so questions starting with "search" still go to the vault
+SEARCH_COMMAND = "/search"
 
 
 class InputAction(Enum):
@@ -11,6 +17,8 @@ class InputAction(Enum):
     CONTINUE = "continue"
     HANDLED = "handled"
     CONFIG_UPDATED = "config_updated"
+    REBUILD_INDEX = "rebuild_index"
+    SEARCH = "search"
 
 
 def analyze_input(user_input: str, console: Console) -> InputAction:
@@ -25,6 +33,13 @@ def analyze_input(user_input: str, console: Console) -> InputAction:
     elif cmd in ["config"]:
         config_updated = _handle_config(console)
         return InputAction.CONFIG_UPDATED if config_updated else InputAction.HANDLED
+    elif cmd in ["stats"]:
+        _handle_stats(console)
+        return InputAction.HANDLED
+    elif cmd in ["reindex", "rebuild"]:
+        return InputAction.REBUILD_INDEX
+    elif cmd == SEARCH_COMMAND or cmd.startswith(SEARCH_COMMAND + " "):
+        return InputAction.SEARCH
 
     return InputAction.CONTINUE
 
@@ -34,6 +49,9 @@ def _handle_help(console: Console) -> None:
 ## Commands
 - `help` - Show this help
 - `config` - Change settings
+- `reindex` - Discard the cached index and rebuild it from the vault
+- `/search <terms>` - List notes containing the terms (instant, no AI calls)
+- `stats` - Show where the time and tokens of this session went
 - `quit`, `exit` - Exit
 - Ask questions about your vault content
 - Ask to generate markdown nodes and include the URLs you wish the LLM to create the nodes from.
@@ -41,6 +59,57 @@ def _handle_help(console: Console) -> None:
     console.print(Markdown(help_md))
 
 
+def _handle_stats(console: Console) -> None:
+    stats = session_stats()
+    minutes = (time.time() - stats["started"]) / 60
+    console.print(f"\n[dim italic]Session running for {minutes:.0f} min[/dim italic]")
+
+    api_table = Table(title="API usage")
+    for column in ["API", "Calls", "Tokens in", "Tokens out"]:
+        api_table.add_column(column, justify="left" if column == "API" else "right")
+    for kind, usage in stats["api"].items():
+        api_table.add_row(
+            kind,
+            str(usage["calls"]),
+            str(usage["prompt_tokens"]),
+            str(usage["completion_tokens"]),
+        )
+    console.print(api_table)
+
+    if not stats["stages"]:
+        console.print("[dim italic]No stages recorded yet.[/dim italic]")
+        return
+
+    # Stages that took the most time first (nested stages are included in their parents)
+    stage_table = Table(title="Stages")
+    columns = ["Stage", "Count", "Total s", "Mean ms", "Max ms", "LLM calls"]
+    columns += ["Embedding calls", "Tokens in", "Tokens out", "Errors"]
+    for column in columns:
+        stage_table.add_column(column, justify="left" if column == "Stage" else "right")
+    stages = sorted(
+        stats["stages"].items(), key=lambda item: item[1]["total_seconds"], reverse=True
+    )
+    for name, stage in stages:
+        stage_table.add_row(
+            name,
+            str(stage["count"]),
+            f"{stage['total_seconds']:.2f}",
+            f"{stage['mean_seconds'] * 1000:.1f}",
+            f"{stage['max_seconds'] * 1000:.1f}",
+            str(stage["llm_calls"]),
+            str(stage["embedding_calls"]),
+            str(stage["tokens_in"]),
+            str(stage["tokens_out"]),
+            str(stage["errors"]),
+        )
+    console.print(stage_table)
+
+    if os.getenv("TRACE_FILE"):
+        console.print(
+            f"[dim italic]Spans are traced to {os.getenv('TRACE_FILE')}[/dim italic]"
+        )
+
+
 def _handle_config(console: Console) -> bool:
     console.print("\nWhat config would you like to change?")
     console.print("1. Vault path")
@@ -0,0 +1,242 @@
+# Per-stage timing and API usage of the session
+# Spans are opened around the expensive steps (index build, queries, scraping,
+# LLM calls, saving). Each records its wall time and the API calls and tokens
+# made inside it. Open spans are tracked per thread (context variable); work
+# handed to another thread or task is attributed to the caller's spans when it is
+# run in a copy of the caller's context (contextvars.copy_context).
+# Aggregates per stage are kept for the `stats` command. With TRACE_FILE set,
+# every finished span is also appended to that JSONL file for offline profiling.
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+# API usage kinds
+API_KINDS = ["llm", "embedding"]
+
+T = TypeVar("T")
+
+
+@dataclass
+class ApiUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    llm_calls: int = 0
+    embedding_calls: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+# A span that is still open, collecting the API usage made inside it
+@dataclass
+class _OpenSpan:
+    name: str
+    llm_calls: int = 0
+    embedding_calls: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+
+@dataclass
+class _Session:
+    started: float = field(default_factory=time.time)
+    usage: Dict[str, ApiUsage] = field(
+        default_factory=lambda: {kind: ApiUsage() for kind in API_KINDS}
+    )
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+
+_session = _Session()
+_lock = threading.Lock()
+
+# Spans open in the current thread (or task), innermost last
+_open_spans: contextvars.ContextVar[Tuple[_OpenSpan, ...]] = contextvars.ContextVar(
+    "open_spans", default=()
+)
+
+# Trace file handle, opened on the first finished span when TRACE_FILE is set
+_trace_file = None
+_trace_checked = False
+
+
+# Count API calls of a kind ("llm" or "embedding") and their tokens
+def record_api_call(
+    kind: str, prompt_tokens: int = 0, completion_tokens: int = 0, calls: int = 1
+) -> None:
+    prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+    with _lock:
+        usage = _session.usage[kind]
+        usage.calls += calls
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+
+        for open_span in _open_spans.get():
+            if kind == "llm":
+                open_span.llm_calls += calls
+            else:
+                open_span.embedding_calls += calls
+            open_span.tokens_in += prompt_tokens
+            open_span.tokens_out += completion_tokens
+
+
+# Time the enclosed block as a stage, attributes added to the yielded dict are
+# written to the trace
+@contextmanager
+def span(name: str, **attributes) -> Iterator[dict]:
+    parents = _open_spans.get()
+    current = _OpenSpan(name)
+    token = _open_spans.set(parents + (current,))
+    start_time = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        try:
+            _open_spans.reset(token)
+        except ValueError:  # a span in a generator that was closed elsewhere
+            pass
+        _finish(
+            name,
+            start_time,
+            seconds,
+            current,
+            parents[-1].name if parents else None,
+            attributes,
+            error,
+        )
+
+
+# Decorator timing every call of a function as a stage
+def traced(name: str):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Record a stage whose duration was measured by the caller
+def record_timing(name: str, seconds: float, **attributes) -> None:
+    parents = _open_spans.get()
+    _finish(
+        name,
+        time.time() - seconds,
+        seconds,
+        _OpenSpan(name),
+        parents[-1].name if parents else None,
+        attributes,
+        None,
+    )
+
+
+# Yield the items, recording the time spent waiting for them as one stage (for
+# producers overlapping with the caller's work, the time it is held up by them)
+def timed_iter(name: str, items: Iterable[T]) -> Iterator[T]:
+    iterator = iter(items)
+    seconds = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - start
+            yield item
+    finally:
+        record_timing(name, seconds)
+
+
+# Aggregates of the session: per stage and per API kind
+def session_stats() -> dict:
+    with _lock:
+        return {
+            "started": _session.started,
+            "api": {kind: asdict(usage) for kind, usage in _session.usage.items()},
+            "stages": {
+                name: {**asdict(stats), "mean_seconds": stats.mean_seconds}
+                for name, stats in _session.stages.items()
+            },
+        }
+
+
+def _finish(
+    name: str,
+    start_time: float,
+    seconds: float,
+    usage: _OpenSpan,
+    parent: Optional[str],
+    attributes: dict,
+    error: Optional[str],
+) -> None:
+    with _lock:
+        stats = _session.stages.setdefault(name, StageStats())
+        stats.count += 1
+        stats.errors += error is not None
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        stats.llm_calls += usage.llm_calls
+        stats.embedding_calls += usage.embedding_calls
+        stats.tokens_in += usage.tokens_in
+        stats.tokens_out += usage.tokens_out
+
+        trace_file = _get_trace_file()
+        if trace_file is not None:
+            record = {
+                "name": name,
+                "parent": parent,
+                "start": round(start_time, 6),
+                "seconds": round(seconds, 6),
+                "thread": threading.current_thread().name,
+                "llm_calls": usage.llm_calls,
+                "embedding_calls": usage.embedding_calls,
+                "tokens_in": usage.tokens_in,
+                "tokens_out": usage.tokens_out,
+                "error": error,
+                "attributes": attributes,
+            }
+            trace_file.write(json.dumps(record, default=str) + "\n")
+            trace_file.flush()
+
+
+# Called with _lock held
+def _get_trace_file():
+    global _trace_file, _trace_checked
+    if not _trace_checked:
+        _trace_checked = True
+        path = os.getenv("TRACE_FILE")
+        if path:
+            try:
+                _trace_file = open(path, "a", encoding="utf-8")
+            except OSError:
+                _trace_file = None
+    return _trace_file
@@ -1,14 +1,103 @@
+import argparse
+import sys
 import warnings
 
 # Suppress all warnings before importing anything else
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", message=".*validate_default.*")
 
-from src.orchestrator import run_cli
-
 
 def main():
-    run_cli()
+    parser = argparse.ArgumentParser(prog="obsidian-ragsody")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep the vault index up to date while the CLI is running",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="load the index in this process even if an index daemon is running",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    # Non-interactive answering of many questions
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="answer questions from a file without the interactive prompt",
+        description="Answer one question per line (plain text or JSON with "
+        '"question" and "id") and write the results as JSON lines.',
+    )
+    batch_parser.add_argument(
+        "questions",
+        nargs="?",
+        default="-",
+        help="file with one question per line (default: stdin)",
+    )
+    batch_parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=4,
+        help="questions answered at the same time (default: 4)",
+    )
+    batch_parser.add_argument(
+        "-o", "--output", help="write the JSONL results to this file (default: stdout)"
+    )
+    batch_parser.add_argument(
+        "--mode",
+        choices=["hybrid", "vector", "keyword"],
+        help="retrieval mode (default: RETRIEVAL_MODE or hybrid)",
+    )
+
+    # Keeps the index loaded for later CLI sessions and batch runs
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="keep the vault index loaded and serve it to later sessions",
+        description="Load the vault index once and serve queries, folder "
+        "suggestions, note inserts and rebuilds to other obsidian-ragsody "
+        "processes over localhost until stopped.",
+    )
+    daemon_parser.add_argument(
+        "--watch",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="keep the index up to date while the daemon is running",
+    )
+    daemon_actions = daemon_parser.add_mutually_exclusive_group()
+    daemon_actions.add_argument(
+        "--stop", action="store_true", help="stop the running daemon"
+    )
+    daemon_actions.add_argument(
+        "--status", action="store_true", help="show what the running daemon serves"
+    )
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        from src.batch_runner import run_batch
+
+        sys.exit(
+            run_batch(
+                args.questions,
+                args.output,
+                args.concurrency,
+                args.mode,
+                use_daemon=not args.no_daemon,
+            )
+        )
+
+    if args.command == "daemon":
+        from src.index_daemon import print_daemon_status, run_daemon, stop_daemon
+
+        if args.stop:
+            sys.exit(stop_daemon())
+        if args.status:
+            sys.exit(print_daemon_status())
+        sys.exit(run_daemon(watch=args.watch))
+
+    from src.orchestrator import run_cli
+
+    run_cli(watch=args.watch, use_daemon=not args.no_daemon)
 
 
 if __name__ == "__main__":
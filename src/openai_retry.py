@@ -0,0 +1,20 @@
+# Wait times between retries of OpenAI requests (chat completions and embeddings)
+
+import random
+from typing import Optional
+
+import openai
+
+
+# Exponential backoff with full jitter
+def backoff(attempt: int) -> float:
+    return random.uniform(0, min(30.0, 0.5 * 2**attempt))
+
+
+# Seconds to wait according to the Retry-After header of a 429 response
+def retry_after(error: openai.APIStatusError) -> Optional[float]:
+    value = error.response.headers.get("retry-after") if error.response else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
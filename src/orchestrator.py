@@ -1,4 +1,6 @@
+from typing import Optional
 from prompt_toolkit import prompt
+from prompt_toolkit.patch_stdout import patch_stdout
 from rich.console import Console
 from rich.markdown import Markdown
 from .env_setup import check_and_setup_env
@@ -7,13 +9,29 @@ from .request_interpreter import (
     RagVaultRequest,
     GenerateNewMarkdownRequest,
 )
-from .vault_rag.vault_rag import initialize_rag, query_vault, rebuild_vault_index
-from .generate_md.generate_md_orchestrator import generate_markdown_from_urls
-from .input_analyzer import analyze_input, InputAction
+from .input_analyzer import analyze_input, InputAction, SEARCH_COMMAND
+from .rag_warmup import RagWarmup
+from .vault_access import (
+    connect_daemon,
+    insert_vault_note,
+    query_vault,
+    rebuild_vault_index,
+    search_vault,
+    using_daemon,
+)
+
+# The RAG system and the URL pipeline are imported by the handlers that need them
+# (after the warm-up loaded them), so the CLI starts without loading llama_index.
+# With an index daemon running the index is not loaded in this process at all.
+
+# Warm-up of the RAG system started at launch
+_rag_warmup: Optional[RagWarmup] = None
 
 
 # Main CLI orchestrator that handles the interactive loop.
-def run_cli():
+# With watch=True the vault index is kept live in the background while the CLI runs.
+# With use_daemon=False the index is always loaded in this process.
+def run_cli(watch: bool = False, use_daemon: bool = True):
     console = Console()
 
     # Welcome message
@@ -21,14 +39,28 @@ def run_cli():
     console.print(Markdown(welcome_md))
     console.print("- Type 'quit' or 'exit' to quit.")
 
-    # Setup and initialization
-    vault_path, api_key, llm_model, user_name = _setup_and_initialize(console)
+    # Setup, the index is loaded in the background while the user types
+    vault_path, api_key, llm_model, user_name = _setup_and_initialize(
+        console, watch, use_daemon
+    )
+
+    try:
+        _prompt_loop(console, vault_path, api_key, llm_model, user_name)
+    finally:
+        if _rag_warmup is not None:
+            _rag_warmup.stop()
+
 
-    # Interactive prompt loop
+# Interactive prompt loop
+def _prompt_loop(
+    console: Console, vault_path: str, api_key: str, llm_model: str, user_name: str
+) -> None:
     while True:
         try:
             console.print(Markdown("---"))
-            user_input = prompt(f"{user_name}: ")
+            # Warm-up messages are printed above the prompt
+            with patch_stdout():
+                user_input = prompt(f"{user_name}: ")
 
             # Analyze input for special commands
             action = analyze_input(user_input, console)
@@ -51,6 +83,18 @@ def run_cli():
                     print("Configuration reloaded.")
                     continue
 
+                # User requested a full rebuild of the vault index
+                case InputAction.REBUILD_INDEX:
+                    if _index_ready(console):
+                        rebuild_vault_index(force=True)
+                    continue
+
+                # Keyword search, answered from the local index only
+                case InputAction.SEARCH:
+                    terms = user_input.strip()[len(SEARCH_COMMAND) :].strip()
+                    _handle_keyword_search(console, terms)
+                    continue
+
                 # Continue to interpret the input
                 case InputAction.CONTINUE:
                     result = interpret_request(user_input)
@@ -69,21 +113,67 @@ def run_cli():
             break
 
 
-# Setup environment and initialize RAG system
-def _setup_and_initialize(console: Console) -> tuple[str, str, str, str]:
+# Setup environment and connect to the index daemon, or start initializing the RAG
+# system in the background (once per session, like before a config change)
+def _setup_and_initialize(
+    console: Console, watch: bool = False, use_daemon: bool = True
+) -> tuple[str, str, str, str]:
+    global _rag_warmup
     vault_path, api_key, llm_model, user_name = check_and_setup_env()
-    initialize_rag(vault_path, api_key, llm_model)
+    if _rag_warmup is not None or using_daemon():
+        return vault_path, api_key, llm_model, user_name
+
+    status = connect_daemon(vault_path, llm_model) if use_daemon else None
+    if status is not None:
+        console.print(
+            f"[dim italic]Connected to the index daemon (pid {status['pid']}, "
+            f"{status['notes']} notes)[/dim italic]"
+        )
+        if watch and not status["watch"]:
+            console.print(
+                "[dim italic]The daemon is not watching the vault, start it with "
+                "`obsidian-ragsody --watch daemon` to keep the index live[/dim italic]"
+            )
+    else:
+        _rag_warmup = RagWarmup(vault_path, api_key, llm_model, watch)
+        _rag_warmup.start()
     return vault_path, api_key, llm_model, user_name
 
 
+# Wait for the index of this process, True when it (or the daemon) can be used
+def _index_ready(console: Console) -> bool:
+    return using_daemon() or _rag_warmup.wait(console)
+
+
 # Handle vault RAG query requests
 def _handle_rag_query(console: Console, request: RagVaultRequest) -> None:
+    if not _index_ready(console):
+        return
+
     console.print("\n[dim italic]Searching vault...[/dim italic]\n")
     result = query_vault(request.prompt)
     if result["success"] is False:
         console.print(f"[red]{result['error']}[/red]")
 
 
+# Handle keyword search requests by listing the matching notes
+def _handle_keyword_search(console: Console, terms: str) -> None:
+    if not terms:
+        console.print(f"[yellow]Usage: {SEARCH_COMMAND} <terms>[/yellow]")
+        return
+    if not _index_ready(console):
+        return
+
+    results = search_vault(terms)
+    if not results:
+        console.print("[dim italic]No matching notes found.[/dim italic]")
+        return
+
+    for result in results:
+        heading = f" [dim]> {result['heading']}[/dim]" if result["heading"] else ""
+        console.print(f"- {result['file_path']}{heading}")
+
+
 # Handle URL-to-markdown generation requests
 def _handle_markdown_generation(
     console: Console,
@@ -92,6 +182,11 @@ def _handle_markdown_generation(
     api_key: str,
     llm_model: str,
 ) -> None:
+    # The suggested folder and the index update need the RAG system
+    if not _index_ready(console):
+        return
+    from .generate_md.generate_md_orchestrator import generate_markdown_from_urls
+
     # Generate markdown from URLs and handle success/failure
     console.print("\n[dim italic]Generating markdown from URLs...[/dim italic]\n")
     result_data_with_success = generate_markdown_from_urls(
@@ -108,6 +203,9 @@ def _handle_markdown_generation(
             f"\n[red]Failed to generate markdown from URLs: {result_data_with_success['error']}[/red]\n"
         )
 
-    # If successful, reload the RAG index to include the new file
+    # If successful, add the new file straight to the RAG index
     else:
-        rebuild_vault_index()
+        insert_vault_note(
+            result_data_with_success["file_path"],
+            result_data_with_success["markdown"],
+        )
@@ -0,0 +1,69 @@
+# Background start-up of the RAG system
+# The vault index is loaded (or built) on a worker thread while the user types the
+# first question, so the prompt appears right away. llama_index, the OpenAI
+# integrations and the scraping stack are only imported on that thread. Commands
+# that need the index wait for whatever is left of the warm-up.
+
+import threading
+from typing import Optional
+
+from rich.console import Console
+
+
+class RagWarmup:
+
+    def __init__(self, vault_path: str, api_key: str, llm_model: str, watch: bool):
+        self.vault_path = vault_path
+        self.api_key = api_key
+        self.llm_model = llm_model
+        self.watch = watch
+        self.error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    # Block until the index is ready, False if it could not be initialized
+    def wait(self, console: Console) -> bool:
+        if not self._ready.is_set():
+            console.print("[dim italic]Waiting for the vault index...[/dim italic]")
+            self._ready.wait()
+        if self.error is not None:
+            console.print(
+                f"[red]RAG system could not be initialized: {self.error}[/red]"
+            )
+            return False
+        return True
+
+    # Stop the vault watcher if the warm-up started one
+    def stop(self):
+        if self._ready.is_set() and self.watch and self.error is None:
+            from .vault_rag.vault_rag import stop_vault_watcher
+
+            stop_vault_watcher()
+
+    def _run(self):
+        console = Console()
+        try:
+            from .vault_rag.vault_rag import initialize_rag, start_vault_watcher
+
+            initialize_rag(self.vault_path, self.api_key, self.llm_model)
+
+            # Optionally keep the index in sync with edits made in Obsidian
+            if self.watch:
+                mode = start_vault_watcher()
+                console.print(
+                    f"[dim italic]Watching vault for changes ({mode})[/dim italic]"
+                )
+        except Exception as e:
+            self.error = e
+            console.print(f"[red]RAG system could not be initialized: {e}[/red]")
+        finally:
+            self._ready.set()
+
+        # Loaded after the index so it does not delay it, ready for the first URL request
+        try:
+            from .generate_md import generate_md_orchestrator  # noqa: F401
+        except Exception:
+            pass
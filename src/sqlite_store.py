@@ -0,0 +1,78 @@
+# Shared plumbing of the SQLite stores (embedding, answer and page caches and the
+# keyword index): one connection per store shared by all threads behind a lock,
+# statements over long key lists split into chunks, and size-bounded LRU trimming.
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Sequence
+
+# SQLite limits the number of parameters per statement
+SQL_BATCH_SIZE = 500
+
+
+class SQLiteStore:
+
+    # Open (or create) the database and run the schema statements
+    def __init__(self, db_path: Path, schema: Sequence[str]):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        for statement in schema:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Replace the whole content of another store's database with this one's
+    def copy_to(self, other: "SQLiteStore") -> None:
+        with self._lock, other._lock:
+            self._conn.backup(other._conn)
+
+
+# Run sql once per chunk of values, where "{}" in sql stands for the placeholders
+# of a chunk (e.g. "... WHERE key IN ({})"), params are bound before the chunk
+def execute_in(
+    conn: sqlite3.Connection, sql: str, values: Sequence, params: Sequence = ()
+) -> list:
+    rows = []
+    for start in range(0, len(values), SQL_BATCH_SIZE):
+        batch = values[start : start + SQL_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        rows += conn.execute(sql.format(placeholders), [*params, *batch]).fetchall()
+    return rows
+
+
+# Drop the least recently used rows of table (by its last_used column) until
+# their total size is below 90% of max_total, so trimming does not run on every
+# write. size_sql is the size of one row (e.g. "LENGTH(blob)", or "1" to count
+# rows). Returns the new total
+def trim_lru(
+    conn: sqlite3.Connection,
+    table: str,
+    key_column: str,
+    size_sql: str,
+    total: int,
+    max_total: int,
+) -> int:
+    if total <= max_total:
+        return total
+
+    target = int(max_total * 0.9)
+    evicted = []
+    cursor = conn.execute(
+        f"SELECT {key_column}, {size_sql} FROM {table} ORDER BY last_used"
+    )
+    for key, size in cursor:
+        if total <= target:
+            break
+        evicted.append(key)
+        total -= size
+    cursor.close()
+
+    execute_in(conn, f"DELETE FROM {table} WHERE {key_column} IN ({{}})", evicted)
+    return max(total, 0)
@@ -0,0 +1,138 @@
+# Access to the vault index for the CLI and batch mode
+# When an index daemon is running for the configured vault and model, requests
+# are sent to it and this process never loads the index (or llama_index).
+# Otherwise they go to the RAG system of this process, which has to be
+# initialized first (see rag_warmup.py). The functions mirror the ones of
+# vault_rag.vault_rag.
+
+import time
+from pathlib import Path
+from typing import Optional
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+from .daemon_client import DaemonClient, DaemonError
+from .vault_rag.answer_rendering import print_answer_stats, stream_markdown
+
+# Client of the index daemon, None when the index is loaded in this process
+_daemon: Optional[DaemonClient] = None
+
+
+# Use the index daemon serving this vault and model if one is running, returns its
+# status (None when the index has to be loaded in this process)
+def connect_daemon(vault_path: str, llm_model: str) -> Optional[dict]:
+    global _daemon
+    client = DaemonClient.find(vault_path, llm_model)
+    if client is None:
+        return None
+    try:
+        status = client.status()
+    except DaemonError:
+        return None
+    _daemon = client
+    return status
+
+
+def using_daemon() -> bool:
+    return _daemon is not None
+
+
+# Answer a question about the vault, rendered like VaultRAG.query() does
+def query_vault(
+    prompt: str, stream: bool = True, mode: Optional[str] = None, quiet: bool = False
+) -> dict:
+    if _daemon is None:
+        from .vault_rag.vault_rag import query_vault as query_in_process
+
+        return query_in_process(prompt, stream=stream, mode=mode, quiet=quiet)
+
+    console = Console(quiet=quiet)
+    start = time.perf_counter()
+    first_token_seconds = None
+    try:
+        answer = _daemon.query(prompt, mode=mode, stream=stream)
+        if answer.failed:
+            return answer.result()
+        if stream:
+            _, first_token_seconds = stream_markdown(console, answer.tokens(), start)
+        result = answer.result()
+    except DaemonError as e:
+        return {"success": False, "error": str(e)}
+
+    if not result["success"]:
+        return result
+    if not stream:
+        console.print(Markdown(result["answer"]))
+    console.print()
+
+    # Timings as seen from here, including the round trip to the daemon
+    result["total_seconds"] = time.perf_counter() - start
+    if not result["cached"]:
+        result["first_token_seconds"] = first_token_seconds
+    print_answer_stats(console, result)
+    return result
+
+
+# Find similar documents for optimal folder placement
+def find_similar_files(content: str, top_k: int = 3) -> list:
+    if _daemon is None:
+        from .vault_rag.vault_rag import find_similar_files as find_in_process
+
+        return find_in_process(content, top_k)
+
+    try:
+        return _daemon.find_similar(content, top_k)
+    except DaemonError as e:
+        print(f"Error finding similar documents: {e}")
+        return []
+
+
+# Find notes containing the given terms (keyword index only, no API calls)
+def search_vault(terms: str, top_k: int = 10) -> list:
+    if _daemon is None:
+        from .vault_rag.vault_rag import search_vault as search_in_process
+
+        return search_in_process(terms, top_k)
+
+    try:
+        return _daemon.search(terms, top_k)
+    except DaemonError as e:
+        print(f"Error searching the vault: {e}")
+        return []
+
+
+# Add a freshly written note to the index without rescanning the vault
+def insert_vault_note(file_path: str, markdown: str) -> str:
+    if _daemon is None:
+        from .vault_rag.vault_rag import insert_vault_note as insert_in_process
+
+        return insert_in_process(file_path, markdown)
+
+    try:
+        # The daemon runs in another working directory
+        return _daemon.insert_note(str(Path(file_path).absolute()), markdown)
+    except DaemonError as e:
+        message = f"Note not added to the RAG index: {e}"
+        Console().print(f"[yellow]{message}[/yellow]")
+        return message
+
+
+# Update the index to include new or changed files (force=True re-embeds everything)
+def rebuild_vault_index(force: bool = False) -> str:
+    if _daemon is None:
+        from .vault_rag.vault_rag import rebuild_vault_index as rebuild_in_process
+
+        return rebuild_in_process(force)
+
+    # The daemon reports its progress in its own terminal
+    console = Console()
+    console.print("[dim italic]Updating the index of the daemon...[/dim italic]")
+    try:
+        message = _daemon.rebuild(force)
+    except DaemonError as e:
+        message = f"RAG index not updated: {e}"
+        console.print(f"[red]{message}[/red]")
+        return message
+    console.print(f"[dim italic]{message}[/dim italic]")
+    return message
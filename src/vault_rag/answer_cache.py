@@ -0,0 +1,172 @@
+# Persistent cache of vault answers, in front of LLM synthesis
+# Answers are keyed by the normalized question and the settings they depend on.
+# Every entry records the notes it was built from with their content hashes and
+# is only reused while the question retrieves exactly those notes, unchanged: an
+# edited, deleted or newly added relevant note makes it a miss, edits elsewhere
+# in the vault do not. Near-duplicate questions can be matched by query embedding
+# similarity. The cache is bounded by entry count (least recently used are
+# evicted) and a TTL.
+
+import hashlib
+import json
+import re
+import time
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from ..sqlite_store import SQLiteStore, trim_lru
+
+# Default number of cached answers kept
+DEFAULT_MAX_ENTRIES = 1000
+
+# Default lifetime of a cached answer
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+# Normalize a question so trivial differences (case, spacing, final punctuation)
+# map to the same cache key
+def normalize_prompt(prompt: str) -> str:
+    prompt = re.sub(r"\s+", " ", prompt.lower()).strip()
+    return prompt.rstrip(" ?!.")
+
+
+# Notes the given (retrieved) nodes come from, with their content hashes, as
+# stored with an answer (keys sorted, so equal sources compare equal in SQL)
+def answer_sources(nodes, manifest: dict) -> str:
+    paths = {node.node.ref_doc_id for node in nodes}
+    return json.dumps(
+        {path: manifest[path]["hash"] for path in paths if path in manifest},
+        sort_keys=True,
+    )
+
+
+class AnswerCache(SQLiteStore):
+
+    # Open (or create) the cache database
+    def __init__(
+        self,
+        db_path: Path,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        super().__init__(
+            db_path,
+            [
+                """
+                CREATE TABLE IF NOT EXISTS answers (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    embedding BLOB,
+                    answer TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    sources TEXT NOT NULL DEFAULT '{}'
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_answers_scope ON answers (scope)",
+                "CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers (last_used)",
+            ],
+        )
+        # Caches written before sources were recorded (their entries have scopes
+        # that no longer match and age out)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(answers)")]
+        if "sources" not in columns:
+            self._conn.execute(
+                "ALTER TABLE answers ADD COLUMN sources TEXT NOT NULL DEFAULT '{}'"
+            )
+            self._conn.commit()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    # Scope of an answer: the vault, model and query settings it was generated with
+    @staticmethod
+    def make_scope(vault_path: str, llm_model: str, settings: str) -> str:
+        return f"{vault_path}|{llm_model}|{settings}"
+
+    @staticmethod
+    def _key(scope: str, prompt: str) -> str:
+        return hashlib.sha256(
+            f"{scope}\0{normalize_prompt(prompt)}".encode("utf-8")
+        ).hexdigest()
+
+    # Cached answer for exactly this (normalized) question built from the given
+    # sources (see answer_sources), None on a miss
+    def get(self, scope: str, prompt: str, sources: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, answer FROM answers "
+                "WHERE key = ? AND sources = ? AND created >= ?",
+                (self._key(scope, prompt), sources, time.time() - self.ttl_seconds),
+            ).fetchone()
+            return self._touch(row)
+
+    # Cached answer of the most similar earlier question, if similar enough
+    def get_similar(
+        self,
+        scope: str,
+        embedding: List[float],
+        min_similarity: float,
+        sources: str,
+    ) -> Optional[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, answer, embedding FROM answers WHERE scope = ? "
+                "AND sources = ? AND created >= ? AND embedding IS NOT NULL",
+                (scope, sources, time.time() - self.ttl_seconds),
+            ).fetchall()
+            if not rows:
+                return None
+
+            matrix = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+            query = np.asarray(embedding, dtype=np.float32)
+            similarities = (matrix @ query) / (
+                np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12
+            )
+            best = int(np.argmax(similarities))
+            if similarities[best] < min_similarity:
+                return None
+            return self._touch(rows[best][:2])
+
+    # Mark a hit as recently used and return its answer
+    def _touch(self, row) -> Optional[str]:
+        if row is None:
+            return None
+        self._conn.execute(
+            "UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), row[0])
+        )
+        self._conn.commit()
+        return row[1]
+
+    # Store an answer with the notes it was built from (see answer_sources) and
+    # the question's embedding for near-duplicate matching
+    def put(
+        self,
+        scope: str,
+        prompt: str,
+        answer: str,
+        sources: str,
+        embedding: Optional[List[float]] = None,
+    ) -> None:
+        now = time.time()
+        blob = array("f", embedding).tobytes() if embedding is not None else None
+        key = self._key(scope, prompt)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, prompt, blob, answer, now, now, sources),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    # Drop expired entries and the least recently used ones above max_entries
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM answers WHERE created < ?", (now - self.ttl_seconds,)
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        trim_lru(self._conn, "answers", "key", "1", count, self.max_entries)
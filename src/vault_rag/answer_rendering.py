@@ -0,0 +1,97 @@
+# Rendering of vault answers in the terminal
+# Shared by the in-process RAG system, the CLI connected to the index daemon and
+# note revisions, so this module only needs rich (no llama_index).
+
+import time
+from typing import Callable
+
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+
+from ..instrumentation import record_timing
+
+# Shown instead of an empty answer
+NO_ANSWER = "No relevant information found in the vault for your query."
+
+# Minimum seconds between re-renders of a streamed text
+_STREAM_RENDER_INTERVAL = 0.05
+
+
+# Replace empty LLM answers with a readable message
+def answer_or_default(response_str: str) -> str:
+    response_str = response_str.strip()
+    if not response_str or response_str.lower() in ["empty response", "none"]:
+        return NO_ANSWER
+    return response_str
+
+
+# Render streamed tokens progressively as markdown in a live view
+# While tokens arrive the text so far is shown through preview, at the end
+# finish(text) is shown. Returns the finished text and the seconds from start
+# until the first token arrived, the rendering time is recorded as stage
+def stream_markdown(
+    console: Console,
+    tokens,
+    start: float,
+    preview: Callable[[str], str] = lambda text: text,
+    finish: Callable[[str], str] = answer_or_default,
+    stage: str = "query.render",
+) -> tuple[str, float]:
+    text = ""
+    first_token_seconds = None
+    last_render = 0.0
+    render_seconds = 0.0
+
+    with Live(
+        Markdown(""),
+        console=console,
+        refresh_per_second=20,
+        vertical_overflow="visible",
+    ) as live:
+        for token in tokens:
+            if first_token_seconds is None:
+                first_token_seconds = time.perf_counter() - start
+            text += token
+
+            # Re-parsing the markdown for every token is wasteful on long answers
+            now = time.perf_counter()
+            if now - last_render >= _STREAM_RENDER_INTERVAL:
+                live.update(Markdown(preview(text)))
+                last_render = time.perf_counter()
+                render_seconds += last_render - now
+
+        text = finish(text)
+        render_start = time.perf_counter()
+        live.update(Markdown(text))
+        render_seconds += time.perf_counter() - render_start
+
+    record_timing(stage, render_seconds)
+    if first_token_seconds is None:
+        first_token_seconds = time.perf_counter() - start
+    return text, first_token_seconds
+
+
+# Print how long an answer took and the LLM usage behind it (a query result dict)
+def print_answer_stats(console: Console, result: dict) -> None:
+    total_seconds = result["total_seconds"]
+    if result["cached"]:
+        console.print(
+            f"[dim italic]Answered from cache in {total_seconds:.2f}s[/dim italic]"
+        )
+        return
+
+    llm_calls = result["llm_calls"]
+    usage = (
+        f"{llm_calls} LLM call{'s' if llm_calls != 1 else ''}, "
+        f"{result['prompt_tokens']} prompt + {result['completion_tokens']} completion tokens"
+    )
+    if result["first_token_seconds"] is not None:
+        console.print(
+            f"[dim italic]First token after {result['first_token_seconds']:.1f}s, "
+            f"answer complete after {total_seconds:.1f}s ({usage})[/dim italic]"
+        )
+    else:
+        console.print(
+            f"[dim italic]Answered in {total_seconds:.1f}s ({usage})[/dim italic]"
+        )
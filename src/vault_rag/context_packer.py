@@ -0,0 +1,103 @@
+# Packs retrieved chunks into a single prompt under a token budget
+# Duplicate chunks (e.g. the same passage in two notes) are dropped, chunks are
+# added best first while they fit, and a chunk that no longer fits is trimmed to
+# its sentences that share the most terms with the question. The synthesizer can
+# then answer with one LLM call instead of summarizing chunk groups in a tree.
+
+import re
+from typing import List
+
+from llama_index.core.schema import MetadataMode, NodeWithScore
+from llama_index.core.utils import get_tokenizer
+
+# Default number of context tokens sent to the LLM per question
+DEFAULT_CONTEXT_TOKEN_BUDGET = 3000
+
+# Chunks are not trimmed into less than this many tokens (too little context)
+_MIN_TRIM_TOKENS = 64
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_TERM_RE = re.compile(r"\w{3,}")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+# Drop chunks whose text equals or is contained in a better ranked chunk
+def deduplicate_nodes(nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+    kept = []
+    kept_texts: List[str] = []
+    for node in nodes:
+        text = _normalize(node.node.get_content(metadata_mode=MetadataMode.NONE))
+        if not text or any(text in kept_text for kept_text in kept_texts):
+            continue
+        kept.append(node)
+        kept_texts.append(text)
+    return kept
+
+
+# Keep the sentences sharing the most terms with the question, in their original
+# order, within max_tokens. Returns "" if no sentence is relevant or fits.
+def trim_to_relevant_sentences(
+    text: str, question: str, max_tokens: int, tokenizer
+) -> str:
+    question_terms = set(_TERM_RE.findall(question.lower()))
+    sentences = [
+        sentence.strip()
+        for sentence in _SENTENCE_SPLIT_RE.split(text)
+        if sentence.strip()
+    ]
+    scored = [
+        (len(question_terms & set(_TERM_RE.findall(sentence.lower()))), i)
+        for i, sentence in enumerate(sentences)
+    ]
+
+    chosen = []
+    used = 0
+    for score, i in sorted(scored, key=lambda item: (-item[0], item[1])):
+        if score == 0:
+            break
+        tokens = len(tokenizer(sentences[i]))
+        if used + tokens > max_tokens:
+            continue
+        chosen.append(i)
+        used += tokens
+
+    return "\n".join(sentences[i] for i in sorted(chosen))
+
+
+# Deduplicate and pack chunks (best score first) into at most token_budget tokens
+def pack_context(
+    nodes: List[NodeWithScore], question: str, token_budget: int
+) -> List[NodeWithScore]:
+    tokenizer = get_tokenizer()
+    ranked = sorted(nodes, key=lambda node: node.score or 0.0, reverse=True)
+
+    packed = []
+    remaining = token_budget
+    for node in deduplicate_nodes(ranked):
+        tokens = len(tokenizer(node.node.get_content(metadata_mode=MetadataMode.LLM)))
+        if tokens <= remaining:
+            packed.append(node)
+            remaining -= tokens
+            continue
+
+        # Trim the chunk text, its metadata header is sent as well
+        text = node.node.get_content(metadata_mode=MetadataMode.NONE)
+        text_budget = remaining - (tokens - len(tokenizer(text)))
+        if text_budget < _MIN_TRIM_TOKENS:
+            continue
+        trimmed = trim_to_relevant_sentences(text, question, text_budget, tokenizer)
+        if not trimmed:
+            continue
+
+        # Copy the node, the original stays untouched in the docstore
+        trimmed_node = node.node.model_copy()
+        trimmed_node.set_content(trimmed)
+        packed.append(NodeWithScore(node=trimmed_node, score=node.score))
+        remaining -= len(
+            tokenizer(trimmed_node.get_content(metadata_mode=MetadataMode.LLM))
+        )
+
+    return packed
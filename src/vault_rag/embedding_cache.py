@@ -0,0 +1,186 @@
+# Content-addressed embedding cache stored in SQLite
+# Embeddings are keyed by (model, hash of the chunk text), so unchanged chunks are
+# never embedded twice: not after a rebuild, a rename/move or a config change.
+# The cache is size-bounded and evicts the least recently used entries.
+
+import hashlib
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+from ..sqlite_store import SQLiteStore, execute_in, trim_lru
+
+# Default size limit of the cache file contents (~80k embeddings of 1536 dims)
+DEFAULT_MAX_CACHE_BYTES = 500 * 1024 * 1024
+
+
+# Hash a chunk text for use as cache key
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(SQLiteStore):
+
+    # Open (or create) the cache database
+    def __init__(self, db_path: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        super().__init__(
+            db_path,
+            [
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)",
+            ],
+        )
+        self.max_bytes = max_bytes
+
+        # Running total of stored embedding bytes, used for eviction
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings"
+        ).fetchone()
+        self._total_bytes = row[0]
+
+    # Look up embeddings for the given text hashes, returns only the hits
+    def get_many(self, model: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            rows = execute_in(
+                self._conn,
+                "SELECT text_hash, embedding FROM embeddings "
+                "WHERE model = ? AND text_hash IN ({})",
+                text_hashes,
+                [model],
+            )
+            for text_hash, blob in rows:
+                found[text_hash] = array("f", blob).tolist()
+
+            # Mark hits as recently used so they survive eviction
+            execute_in(
+                self._conn,
+                "UPDATE embeddings SET last_used = ? "
+                "WHERE model = ? AND text_hash IN ({})",
+                list(found),
+                [now, model],
+            )
+            self._conn.commit()
+
+        return found
+
+    # Store embeddings for the given text hashes and evict if over the size limit
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]) -> None:
+        if not embeddings:
+            return
+
+        now = time.time()
+        rows = [
+            (model, text_hash, array("f", embedding).tobytes(), now)
+            for text_hash, embedding in embeddings.items()
+        ]
+
+        with self._lock:
+            for row in rows:
+                old = self._conn.execute(
+                    "SELECT LENGTH(embedding) FROM embeddings "
+                    "WHERE model = ? AND text_hash = ?",
+                    row[:2],
+                ).fetchone()
+                if old is not None:
+                    self._total_bytes -= old[0]
+                self._total_bytes += len(row[2])
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows
+            )
+            self._total_bytes = trim_lru(
+                self._conn,
+                "embeddings",
+                "rowid",
+                "LENGTH(embedding)",
+                self._total_bytes,
+                self.max_bytes,
+            )
+            self._conn.commit()
+
+
+# Embedding model wrapper that serves repeated chunk texts from an EmbeddingCache
+class CachedEmbedding(BaseEmbedding):
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(
+        self, embed_model: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any
+    ):
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs,
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    # Queries are short and rarely repeat exactly, they go straight to the model
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed_model._get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await self._embed_model._aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        text_hashes, cached, missing = self._lookup(texts)
+        if missing:
+            new_embeddings = self._embed_model._get_text_embeddings(
+                [texts[i] for i in missing]
+            )
+            self._store(text_hashes, cached, missing, new_embeddings)
+        return [cached[text_hash] for text_hash in text_hashes]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        text_hashes, cached, missing = self._lookup(texts)
+        if missing:
+            new_embeddings = await self._embed_model._aget_text_embeddings(
+                [texts[i] for i in missing]
+            )
+            self._store(text_hashes, cached, missing, new_embeddings)
+        return [cached[text_hash] for text_hash in text_hashes]
+
+    # Split texts into cache hits and the indexes of texts that still need embedding
+    def _lookup(self, texts: List[str]):
+        text_hashes = [hash_text(text) for text in texts]
+        cached = self._cache.get_many(self.model_name, list(set(text_hashes)))
+
+        missing = []
+        seen = set(cached)
+        for i, text_hash in enumerate(text_hashes):
+            if text_hash not in seen:
+                missing.append(i)
+                seen.add(text_hash)
+        return text_hashes, cached, missing
+
+    def _store(self, text_hashes, cached, missing, new_embeddings) -> None:
+        fresh = {
+            text_hashes[i]: embedding for i, embedding in zip(missing, new_embeddings)
+        }
+        self._cache.put_many(self.model_name, fresh)
+        cached.update(fresh)
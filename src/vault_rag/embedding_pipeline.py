@@ -0,0 +1,251 @@
+# Concurrent, batched embedding requests for index builds
+# Chunks are packed into token-budgeted batches and several batches are kept in
+# flight at once. On rate limits (429) the number of requests in flight is halved
+# and the request is retried after the server's Retry-After (or an exponential
+# backoff with jitter); it grows back slowly while requests succeed.
+# The OpenAI base URL can be pointed at a local fake server for offline benchmarks.
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import openai
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.utils import get_tokenizer
+from pydantic import PrivateAttr
+
+from ..background_loop import BackgroundLoop
+from ..instrumentation import record_api_call
+from ..openai_retry import backoff, retry_after
+
+# Token budget per embeddings request (the API allows far more, smaller batches
+# spread better across concurrent requests)
+DEFAULT_MAX_BATCH_TOKENS = 8000
+
+# Inputs per embeddings request allowed by the API
+MAX_BATCH_ITEMS = 2048
+
+# Requests kept in flight when no rate limit has been hit
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Attempts per batch before giving up
+_MAX_ATTEMPTS = 6
+
+
+@dataclass
+class EmbeddingStats:
+    chunks: int = 0
+    tokens: int = 0
+    requests: int = 0
+    rate_limited: int = 0
+    seconds: float = 0.0
+
+    # Stats accumulated since an earlier snapshot of the same counters
+    def since(self, earlier: "EmbeddingStats") -> "EmbeddingStats":
+        return EmbeddingStats(
+            chunks=self.chunks - earlier.chunks,
+            tokens=self.tokens - earlier.tokens,
+            requests=self.requests - earlier.requests,
+            rate_limited=self.rate_limited - earlier.rate_limited,
+            seconds=self.seconds - earlier.seconds,
+        )
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+
+# Split texts into batches that stay under the token and item limits
+def pack_batches(
+    texts: List[str],
+    token_counts: List[int],
+    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+    max_batch_items: int = MAX_BATCH_ITEMS,
+) -> List[List[int]]:
+    batches = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for i, tokens in enumerate(token_counts):
+        if current and (
+            current_tokens + tokens > max_batch_tokens
+            or len(current) >= max_batch_items
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Concurrency limit that halves on rate limits and grows back on success
+class _AdaptiveLimiter:
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, rate_limited: bool) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            if rate_limited:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self.limit < self.max_concurrency and self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+# OpenAI embedding model that embeds large lists of chunks concurrently
+class PipelinedOpenAIEmbedding(BaseEmbedding):
+    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+
+    _api_key: str = PrivateAttr()
+    _base_url: Optional[str] = PrivateAttr()
+    _client: Optional[openai.AsyncOpenAI] = PrivateAttr(default=None)
+    # All requests run on one private event loop so the pooled client is reused
+    # across calls, whether they come from sync code or another event loop
+    _loop: BackgroundLoop = PrivateAttr(default_factory=BackgroundLoop)
+    _limiter: Optional[_AdaptiveLimiter] = PrivateAttr(default=None)
+    _tokenizer: Any = PrivateAttr(default=None)
+    _stats: EmbeddingStats = PrivateAttr(default_factory=EmbeddingStats)
+
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ):
+        super().__init__(
+            model_name=model,
+            embed_batch_size=MAX_BATCH_ITEMS,
+            max_batch_tokens=max_batch_tokens,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
+        self._api_key = api_key
+        self._base_url = base_url
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "PipelinedOpenAIEmbedding"
+
+    # Throughput of all embedding requests made so far
+    @property
+    def stats(self) -> EmbeddingStats:
+        return self._stats
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._get_text_embeddings([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return (await self._aget_text_embeddings([query]))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    # Requests run on the private loop, their usage is recorded in the calling
+    # thread so it counts towards the caller's instrumentation spans
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings, requests, tokens = self._loop.submit(
+            self._embed_all(texts)
+        ).result()
+        record_api_call("embedding", tokens, calls=requests)
+        return embeddings
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        future = self._loop.submit(self._embed_all(texts))
+        embeddings, requests, tokens = await asyncio.wrap_future(future)
+        record_api_call("embedding", tokens, calls=requests)
+        return embeddings
+
+    def _count_tokens(self, text: str) -> int:
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer()
+        return len(self._tokenizer(text))
+
+    # Returns the embeddings, the number of requests and the tokens embedded
+    async def _embed_all(self, texts: List[str]) -> tuple[List[List[float]], int, int]:
+        if self._client is None:
+            # Retries are handled here so rate limits also reduce concurrency
+            self._client = openai.AsyncOpenAI(
+                api_key=self._api_key, base_url=self._base_url, max_retries=0
+            )
+            # Shared across calls so a rate limit slows down the following batches too
+            self._limiter = _AdaptiveLimiter(self.max_concurrency)
+
+        token_counts = [self._count_tokens(text) for text in texts]
+        batches = pack_batches(texts, token_counts, self.max_batch_tokens)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[
+                self._embed_batch([texts[i] for i in batch], self._limiter)
+                for batch in batches
+            ]
+        )
+        self._stats.seconds += time.perf_counter() - start
+        self._stats.chunks += len(texts)
+        self._stats.tokens += sum(token_counts)
+
+        embeddings: List[List[float]] = [[] for _ in texts]
+        for batch, batch_embeddings in zip(batches, results):
+            for i, embedding in zip(batch, batch_embeddings):
+                embeddings[i] = embedding
+        return embeddings, len(batches), sum(token_counts)
+
+    async def _embed_batch(
+        self, texts: List[str], limiter: _AdaptiveLimiter
+    ) -> List[List[float]]:
+        for attempt in range(_MAX_ATTEMPTS):
+            await limiter.acquire()
+            rate_limited = False
+            try:
+                self._stats.requests += 1
+                response = await self._client.embeddings.create(
+                    input=texts, model=self.model_name
+                )
+                return [item.embedding for item in response.data]
+            except openai.RateLimitError as e:
+                rate_limited = True
+                self._stats.rate_limited += 1
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                delay = retry_after(e) or backoff(attempt)
+            except (
+                openai.APIConnectionError,
+                openai.APITimeoutError,
+                openai.InternalServerError,
+            ):
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                delay = backoff(attempt)
+            finally:
+                await limiter.release(rate_limited)
+
+            await asyncio.sleep(delay)
@@ -0,0 +1,104 @@
+# Retriever fusing vector search with the BM25 keyword index
+# Both result lists are merged with reciprocal rank fusion, which only looks at
+# ranks, so the differently scaled similarity and BM25 scores need no calibration.
+# In keyword mode the vector search is skipped and no embedding request is made.
+
+from typing import Dict, List, Optional, Tuple
+
+from llama_index.core import VectorStoreIndex
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from .keyword_index import KeywordIndex
+
+RETRIEVAL_MODES = ["hybrid", "vector", "keyword"]
+
+# Rank constant of reciprocal rank fusion (as in the original paper)
+RRF_K = 60
+
+# Candidates fetched from each retriever per requested result
+_CANDIDATE_FACTOR = 2
+
+
+# Fuse several rankings of ids into one, returns (id, fused score) best first
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, node_id in enumerate(ranking):
+            scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+
+    def __init__(
+        self,
+        index: VectorStoreIndex,
+        keyword_index: Optional[KeywordIndex],
+        similarity_top_k: int = 5,
+        mode: str = "hybrid",
+        callback_manager: Optional[CallbackManager] = None,
+    ):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode '{mode}', expected one of: {', '.join(RETRIEVAL_MODES)}"
+            )
+        self.index = index
+        self.keyword_index = keyword_index
+        self.similarity_top_k = similarity_top_k
+        # Without a keyword index only vector search is possible
+        self.mode = mode if keyword_index is not None else "vector"
+        # Vector retriever built once (hybrid mode fetches extra candidates to fuse)
+        self.candidates = (
+            similarity_top_k
+            if self.mode == "vector"
+            else similarity_top_k * _CANDIDATE_FACTOR
+        )
+        self.vector_retriever = (
+            index.as_retriever(similarity_top_k=self.candidates)
+            if self.mode != "keyword"
+            else None
+        )
+        super().__init__(callback_manager=callback_manager)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        if self.mode == "vector":
+            return self.vector_retriever.retrieve(query_bundle)
+
+        if self.mode == "keyword":
+            keyword_results = self.keyword_index.search(
+                query_bundle.query_str, self.similarity_top_k
+            )
+            return self._load_nodes(keyword_results, {})
+
+        keyword_ids = [
+            node_id
+            for node_id, _ in self.keyword_index.search(
+                query_bundle.query_str, self.candidates
+            )
+        ]
+        vector_results = self.vector_retriever.retrieve(query_bundle)
+        known = {result.node.node_id: result.node for result in vector_results}
+        fused = reciprocal_rank_fusion(
+            [[result.node.node_id for result in vector_results], keyword_ids]
+        )
+        return self._load_nodes(fused[: self.similarity_top_k], known)
+
+    # Attach node objects to ranked ids, loading keyword-only hits from the docstore
+    def _load_nodes(
+        self, fused: List[Tuple[str, float]], known: dict
+    ) -> List[NodeWithScore]:
+        missing = [node_id for node_id, _ in fused if node_id not in known]
+        if missing:
+            for node in self.index.docstore.get_nodes(missing, raise_error=False):
+                if node is not None:
+                    known[node.node_id] = node
+
+        return [
+            NodeWithScore(node=known[node_id], score=score)
+            for node_id, score in fused
+            if node_id in known
+        ]
@@ -0,0 +1,152 @@
+# Persists the vault RAG index to disk so startup does not re-embed the whole vault
+# Every index lives in its own folder under the user data dir, keyed by vault path
+# and embedding model, next to a small meta file used to decide if it can be reused.
+# Processes sharing a folder (e.g. the index daemon and a CLI session for another
+# LLM model) take turns writing it through a lock file next to it (see IndexLock)
+
+import hashlib
+import json
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..env_setup import get_data_dir
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, where the folder is not locked
+    fcntl = None
+
+# Bump when the on-disk layout changes so old indexes get rebuilt
+STORAGE_FORMAT_VERSION = 6
+
+_META_FILE = "ragsody_meta.json"
+
+
+# Get the folder where the index for this vault + embedding model is stored
+def get_index_dir(vault_path: str, embed_model: str) -> Path:
+    vault = Path(vault_path).expanduser().resolve()
+    key = hashlib.sha256(f"{vault}|{embed_model}".encode("utf-8")).hexdigest()[:16]
+    return get_data_dir() / "indexes" / key
+
+
+# Check if a persisted index exists and was built for this vault and model
+# (and vector backend, unless any backend will do)
+def is_index_valid(
+    index_dir: Path,
+    vault_path: str,
+    embed_model: str,
+    vector_backend: Optional[str] = None,
+) -> bool:
+    meta = read_index_meta(index_dir)
+    if meta is None:
+        return False
+
+    return (
+        meta.get("format_version") == STORAGE_FORMAT_VERSION
+        and meta.get("vault_path") == str(Path(vault_path).expanduser().resolve())
+        and meta.get("embed_model") == embed_model
+        and vector_backend in (None, meta.get("vector_backend"))
+    )
+
+
+# Read the meta file of a persisted index, None if missing or unreadable
+def read_index_meta(index_dir: Path) -> Optional[dict]:
+    meta_file = index_dir / _META_FILE
+    if not meta_file.exists():
+        return None
+
+    try:
+        with open(meta_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+# Write the meta file after the index has been persisted, returns its content
+# (a new save id tells other processes that the index changed)
+def write_index_meta(
+    index_dir: Path, vault_path: str, embed_model: str, vector_backend: str
+) -> dict:
+    meta = {
+        "format_version": STORAGE_FORMAT_VERSION,
+        "vault_path": str(Path(vault_path).expanduser().resolve()),
+        "embed_model": embed_model,
+        "vector_backend": vector_backend,
+        "save_id": uuid.uuid4().hex,
+    }
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    with open(index_dir / _META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# Remove a persisted index so the next build starts from scratch
+def clear_index(index_dir: Path) -> None:
+    if index_dir.exists():
+        shutil.rmtree(index_dir)
+
+
+# Folder a new index is built in before it replaces the one in index_dir
+def get_staging_dir(index_dir: Path) -> Path:
+    return index_dir.with_name(index_dir.name + ".rebuild")
+
+
+# Move a freshly built index from staging_dir into index_dir, replacing the old one
+def replace_index(staging_dir: Path, index_dir: Path) -> None:
+    retired_dir = index_dir.with_name(index_dir.name + ".old")
+    clear_index(retired_dir)
+    if index_dir.exists():
+        index_dir.rename(retired_dir)
+    staging_dir.rename(index_dir)
+    clear_index(retired_dir)
+
+
+# Re-entrant lock for writing an index folder, held across threads and processes
+# The first acquisition in a process takes an exclusive flock on a lock file next
+# to the folder (not inside it, rebuilds replace the folder). on_wait is called
+# before waiting for another process holding it
+class IndexLock:
+
+    def __init__(self, index_dir: Path, on_wait: Optional[Callable[[], None]] = None):
+        self.path = index_dir.with_name(index_dir.name + ".lock")
+        self.on_wait = on_wait
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self) -> None:
+        self._lock.acquire()
+        self._depth += 1
+        if self._depth > 1 or fcntl is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a")
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if self.on_wait is not None:
+                    self.on_wait()
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            # Closing the file releases the flock
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+    def __enter__(self) -> "IndexLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
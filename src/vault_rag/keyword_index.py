@@ -0,0 +1,117 @@
+# On-disk BM25 keyword index of the vault chunks, stored next to the vector index
+# Uses SQLite FTS5, so exact names, tags and code identifiers can be found without
+# an embedding round-trip. It is updated together with the vector index: the chunks
+# of changed notes are replaced, nothing is rebuilt.
+
+import re
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+from llama_index.core.schema import BaseNode, MetadataMode
+
+from ..sqlite_store import SQLiteStore, execute_in
+
+KEYWORD_INDEX_FILE = "keyword_index.sqlite3"
+
+# Column weights for BM25: title, heading, tags, text
+_COLUMN_WEIGHTS = (4.0, 2.0, 3.0, 1.0)
+
+# Query terms used at most (long inputs like whole notes are cut off)
+_MAX_QUERY_TERMS = 64
+
+_TERM_RE = re.compile(r"\w+")
+
+
+# Turn free text into an FTS5 query matching any of its terms
+# Terms are quoted so FTS5 syntax in the input is never interpreted; a quoted
+# identifier like get_tokenizer becomes the phrase "get tokenizer"
+def build_match_query(text: str) -> str:
+    terms = list(dict.fromkeys(_TERM_RE.findall(text.lower())))
+    return " OR ".join(f'"{term}"' for term in terms[:_MAX_QUERY_TERMS])
+
+
+class KeywordIndex(SQLiteStore):
+
+    # Open (or create) the keyword index database
+    def __init__(self, db_path: Path):
+        super().__init__(
+            db_path,
+            [
+                """
+                CREATE TABLE IF NOT EXISTS nodes (
+                    rowid INTEGER PRIMARY KEY,
+                    node_id TEXT NOT NULL UNIQUE,
+                    doc_id TEXT NOT NULL
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_doc_id ON nodes (doc_id)",
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                    title, heading, tags, text,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+                """,
+            ],
+        )
+
+    # Remove the chunks of the given documents and add the given nodes in one step
+    def replace_documents(
+        self, removed_doc_ids: Iterable[str], nodes: Sequence[BaseNode]
+    ) -> None:
+        # Documents of the new nodes are cleared too, so re-adding is idempotent
+        doc_ids = set(removed_doc_ids)
+        doc_ids.update(node.ref_doc_id for node in nodes if node.ref_doc_id)
+
+        with self._lock:
+            self._delete_documents(list(doc_ids))
+            for node in nodes:
+                cursor = self._conn.execute(
+                    "INSERT OR REPLACE INTO nodes (node_id, doc_id) VALUES (?, ?)",
+                    (node.node_id, node.ref_doc_id or node.node_id),
+                )
+                metadata = node.metadata
+                self._conn.execute(
+                    "INSERT INTO chunks (rowid, title, heading, tags, text) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        cursor.lastrowid,
+                        metadata.get("title", ""),
+                        metadata.get("heading", ""),
+                        metadata.get("tags", ""),
+                        node.get_content(metadata_mode=MetadataMode.NONE),
+                    ),
+                )
+            self._conn.commit()
+
+    def _delete_documents(self, doc_ids: List[str]) -> None:
+        rowids = execute_in(
+            self._conn, "SELECT rowid FROM nodes WHERE doc_id IN ({})", doc_ids
+        )
+        self._conn.executemany("DELETE FROM chunks WHERE rowid = ?", rowids)
+        self._conn.executemany("DELETE FROM nodes WHERE rowid = ?", rowids)
+
+    # Best matching node ids for a free-text query, as (node_id, bm25 score)
+    # with higher scores being better
+    def search(self, text: str, top_k: int) -> List[Tuple[str, float]]:
+        match_query = build_match_query(text)
+        if not match_query:
+            return []
+
+        weights = ", ".join(str(weight) for weight in _COLUMN_WEIGHTS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT nodes.node_id, bm25(chunks, {weights}) AS score "
+                f"FROM chunks JOIN nodes ON nodes.rowid = chunks.rowid "
+                f"WHERE chunks MATCH ? ORDER BY score LIMIT ?",
+                (match_query, top_k),
+            ).fetchall()
+
+        # FTS5 reports BM25 as a negative number (lower is better)
+        return [(node_id, -score) for node_id, score in rows]
+
+    # Remove all chunks (before a full rebuild)
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM nodes")
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
@@ -0,0 +1,237 @@
+# Splits Obsidian notes into chunks along their markdown structure
+# YAML frontmatter is parsed into metadata instead of being embedded as raw text,
+# sections are split on headings (never inside code blocks) and keep their heading
+# path as metadata. Tiny sections are merged with the following ones and large
+# sections are split on paragraphs, so chunks stay between min and max tokens.
+# [[wikilinks]] and ^block-ids are recorded as metadata; block ids are removed from
+# the chunk text since they carry no meaning for embeddings.
+
+import re
+from pathlib import Path
+from typing import Any, List, Sequence, Tuple
+
+import yaml
+from llama_index.core.node_parser import NodeParser, SentenceSplitter
+from llama_index.core.node_parser.node_utils import build_nodes_from_splits
+from llama_index.core.schema import BaseNode, MetadataMode, TextNode
+from llama_index.core.utils import get_tokenizer
+
+_FRONTMATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+_HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$")
+_FENCE_RE = re.compile(r"^[ \t]*(```|~~~)")
+_BLOCK_ID_RE = re.compile(r"[ \t]+\^([A-Za-z0-9-]+)[ \t]*$", re.M)
+_WIKILINK_RE = re.compile(r"!?\[\[([^\]|#^]+)(?:[#^][^\]|]*)?(?:\|[^\]]*)?\]\]")
+
+# Structural metadata that is useful for filtering/display but not for embeddings
+_STRUCTURE_ONLY_METADATA = ["links", "block_ids"]
+
+# Names of the note are left out of embeddings, so a renamed or moved note keeps
+# its chunk texts and hits the embedding cache (LLM prompts and the keyword index
+# still see them)
+_NAME_METADATA = ["title", "aliases"]
+
+
+# Parse YAML frontmatter, returns (frontmatter dict, body without frontmatter)
+def split_frontmatter(text: str) -> Tuple[dict, str]:
+    match = _FRONTMATTER_RE.match(text)
+    if not match:
+        return {}, text
+
+    try:
+        frontmatter = yaml.safe_load(match.group(1)) or {}
+    except yaml.YAMLError:
+        frontmatter = {}
+    if not isinstance(frontmatter, dict):
+        frontmatter = {}
+    return frontmatter, text[match.end() :]
+
+
+# Normalize a frontmatter list field (YAML list or comma/space separated string)
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,\s]+", value)
+    if not isinstance(value, list):
+        value = [value]
+    return [str(item).lstrip("#").strip() for item in value if str(item).strip()]
+
+
+# Split a note body into (heading path, section text) along its headings
+def split_sections(body: str) -> List[Tuple[List[str], str]]:
+    sections = []
+    heading_stack: List[Tuple[int, str]] = []
+    current_lines: List[str] = []
+    in_code = False
+
+    def flush():
+        text = "\n".join(current_lines).strip()
+        if text:
+            sections.append(([title for _, title in heading_stack], text))
+
+    for line in body.split("\n"):
+        if _FENCE_RE.match(line):
+            in_code = not in_code
+        elif not in_code:
+            heading = _HEADING_RE.match(line)
+            if heading:
+                flush()
+                current_lines = []
+                level = len(heading.group(1))
+                while heading_stack and heading_stack[-1][0] >= level:
+                    heading_stack.pop()
+                heading_stack.append((level, heading.group(2)))
+        current_lines.append(line)
+
+    flush()
+    return sections
+
+
+# Heading path shared by two sections
+def _common_prefix(a: List[str], b: List[str]) -> List[str]:
+    prefix = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        prefix.append(x)
+    return prefix
+
+
+class ObsidianMarkdownNodeParser(NodeParser):
+    # Sections below this many tokens are merged with a neighbouring section
+    min_chunk_tokens: int = 128
+    # Sections above this many tokens are split on paragraphs
+    max_chunk_tokens: int = 1024
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ObsidianMarkdownNodeParser"
+
+    def _parse_nodes(
+        self,
+        nodes: Sequence[BaseNode],
+        show_progress: bool = False,
+        **kwargs: Any,
+    ) -> List[BaseNode]:
+        all_nodes: List[BaseNode] = []
+        for node in nodes:
+            all_nodes.extend(self._parse_note(node))
+        return all_nodes
+
+    def _parse_note(self, node: BaseNode) -> List[TextNode]:
+        text = node.get_content(metadata_mode=MetadataMode.NONE)
+        frontmatter, body = split_frontmatter(text)
+
+        chunks = self._merge_and_cap(split_sections(body))
+        if not chunks and frontmatter:
+            # Note with frontmatter only: index its properties
+            chunks = [([], yaml.safe_dump(frontmatter, sort_keys=False).strip())]
+
+        texts = []
+        chunk_metadata = []
+        for heading_path, chunk_text in chunks:
+            block_ids = _BLOCK_ID_RE.findall(chunk_text)
+            chunk_text = _BLOCK_ID_RE.sub("", chunk_text)
+            links = list(dict.fromkeys(_WIKILINK_RE.findall(chunk_text)))
+            texts.append(chunk_text)
+            chunk_metadata.append(
+                {
+                    "heading": " > ".join(heading_path),
+                    "links": ", ".join(link.strip() for link in links),
+                    "block_ids": ", ".join(block_ids),
+                }
+            )
+
+        note_metadata = {}
+        if self.include_metadata:
+            file_path = node.metadata.get("file_path")
+            if file_path:
+                note_metadata["title"] = Path(file_path).stem
+            tags = _as_list(frontmatter.get("tags") or frontmatter.get("tag"))
+            if tags:
+                note_metadata["tags"] = ", ".join(tags)
+            aliases = _as_list(frontmatter.get("aliases") or frontmatter.get("alias"))
+            if aliases:
+                note_metadata["aliases"] = ", ".join(aliases)
+
+        parsed = build_nodes_from_splits(texts, node, id_func=self.id_func)
+        for parsed_node, metadata in zip(parsed, chunk_metadata):
+            if self.include_metadata:
+                parsed_node.metadata.update(note_metadata)
+                parsed_node.metadata.update(
+                    {key: value for key, value in metadata.items() if value}
+                )
+            parsed_node.excluded_embed_metadata_keys = (
+                list(parsed_node.excluded_embed_metadata_keys)
+                + _STRUCTURE_ONLY_METADATA
+                + _NAME_METADATA
+            )
+            parsed_node.excluded_llm_metadata_keys = (
+                list(parsed_node.excluded_llm_metadata_keys) + _STRUCTURE_ONLY_METADATA
+            )
+        return parsed
+
+    # Merge tiny sections into their neighbours and split oversized ones
+    def _merge_and_cap(
+        self, sections: List[Tuple[List[str], str]]
+    ) -> List[Tuple[List[str], str]]:
+        tokenizer = get_tokenizer()
+        chunks: List[Tuple[List[str], str]] = []
+        pending_path: List[str] = []
+        pending_text = ""
+
+        for heading_path, text in sections:
+            if pending_text:
+                # A tiny section is prepended to the next one, the merged chunk
+                # keeps the heading path both have in common
+                pending_path = _common_prefix(pending_path, heading_path)
+                pending_text = f"{pending_text}\n\n{text}"
+            else:
+                pending_path, pending_text = heading_path, text
+
+            # Big enough to stand on its own
+            if len(tokenizer(pending_text)) >= self.min_chunk_tokens:
+                chunks.extend(self._cap(pending_path, pending_text, tokenizer))
+                pending_text = ""
+
+        if pending_text:
+            # Trailing tiny section: append it to the previous chunk if that fits
+            if chunks:
+                last_path, last_text = chunks[-1]
+                merged = f"{last_text}\n\n{pending_text}"
+                if len(tokenizer(merged)) <= self.max_chunk_tokens:
+                    chunks[-1] = (_common_prefix(last_path, pending_path), merged)
+                    return chunks
+            chunks.append((pending_path, pending_text))
+        return chunks
+
+    # Split a section above max_chunk_tokens on paragraphs (then sentences)
+    def _cap(
+        self, heading_path: List[str], text: str, tokenizer
+    ) -> List[Tuple[List[str], str]]:
+        if len(tokenizer(text)) <= self.max_chunk_tokens:
+            return [(heading_path, text)]
+
+        sentence_splitter = SentenceSplitter(
+            chunk_size=self.max_chunk_tokens, chunk_overlap=0
+        )
+        pieces = []
+        current = ""
+        for paragraph in re.split(r"\n[ \t]*\n", text):
+            if len(tokenizer(paragraph)) > self.max_chunk_tokens:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.extend(sentence_splitter.split_text(paragraph))
+                continue
+
+            candidate = f"{current}\n\n{paragraph}" if current else paragraph
+            if len(tokenizer(candidate)) > self.max_chunk_tokens:
+                pieces.append(current)
+                current = paragraph
+            else:
+                current = candidate
+
+        if current:
+            pieces.append(current)
+        return [(heading_path, piece) for piece in pieces if piece.strip()]
@@ -0,0 +1,49 @@
+# LLM token counting per query
+# LlamaIndex's TokenCountingHandler appends the token counts of every LLM call to
+# one shared list, so with queries answered concurrently (batch mode) the calls of
+# one question cannot be told apart from the others by slicing that list. This
+# handler hands each event to the collector opened by the query that is running in
+# the current thread instead, and keeps no history of its own.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from llama_index.core.callbacks import CBEventType, TokenCountingHandler
+from llama_index.core.callbacks.token_counting import (
+    TokenCountingEvent,
+    get_llm_token_counts,
+)
+
+# Token counting events of the query running in the current thread (or task)
+_collector: ContextVar[Optional[List[TokenCountingEvent]]] = ContextVar(
+    "llm_token_events", default=None
+)
+
+
+class QueryTokenCounter(TokenCountingHandler):
+
+    # Collect the LLM calls made inside the block, the yielded list is filled as
+    # they finish (a streamed answer finishes when its last token was consumed)
+    @contextmanager
+    def collect(self) -> Iterator[List[TokenCountingEvent]]:
+        events: List[TokenCountingEvent] = []
+        token = _collector.set(events)
+        try:
+            yield events
+        finally:
+            _collector.reset(token)
+
+    def on_event_end(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        **kwargs: Any,
+    ) -> None:
+        if event_type != CBEventType.LLM or payload is None:
+            return
+        events = _collector.get()
+        if events is None:
+            return
+        events.append(get_llm_token_counts(self._token_counter, payload, event_id))
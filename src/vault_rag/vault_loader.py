@@ -0,0 +1,89 @@
+# Streams vault notes into the indexing pipeline
+# Files are read on a thread pool and yielded one by one while later files are still
+# being read, so chunking and embedding start right away and only a bounded window
+# of documents is held in memory at any time.
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from llama_index.core import Document
+from llama_index.core.readers.file.base import default_file_metadata_func
+
+from .vault_manifest import hash_bytes
+
+# File metadata kept out of embeddings and LLM prompts (same as SimpleDirectoryReader)
+_EXCLUDED_FILE_METADATA = [
+    "file_name",
+    "file_type",
+    "file_size",
+    "creation_date",
+    "last_modified_date",
+    "last_accessed_date",
+]
+
+# Threads reading files in parallel
+DEFAULT_READ_WORKERS = 8
+
+# Maximum number of documents read ahead of the consumer
+DEFAULT_MAX_PENDING = 64
+
+
+# Build a document for a note with the same id and metadata SimpleDirectoryReader uses
+def make_note_document(file_path: str, text: str) -> Document:
+    document = Document(
+        text=text,
+        id_=file_path,
+        metadata=default_file_metadata_func(file_path),
+    )
+    # Keep the path out of embeddings, so renamed or moved notes hit the embedding
+    # cache (the parser leaves out the note title for the same reason)
+    document.excluded_embed_metadata_keys.extend(
+        _EXCLUDED_FILE_METADATA + ["file_path"]
+    )
+    document.excluded_llm_metadata_keys.extend(_EXCLUDED_FILE_METADATA)
+    return document
+
+
+# Read a single note, returns its document and manifest entry (None if unreadable)
+def load_note(file_path: str) -> Optional[Tuple[Document, dict]]:
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    document = make_note_document(file_path, data.decode("utf-8", errors="ignore"))
+    entry = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": hash_bytes(data)}
+    return document, entry
+
+
+# Yield (document, manifest entry) for every file, reading ahead on a thread pool
+def iter_notes(
+    file_paths: Iterable[str],
+    max_workers: int = DEFAULT_READ_WORKERS,
+    max_pending: int = DEFAULT_MAX_PENDING,
+) -> Iterator[Tuple[Document, dict]]:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+
+        for file_path in file_paths:
+            pending.append(executor.submit(load_note, file_path))
+
+            # Bounded read-ahead: hand out the oldest document before reading more
+            if len(pending) >= max_pending:
+                result = pending.popleft().result()
+                if result is not None:
+                    yield result
+
+        while pending:
+            result = pending.popleft().result()
+            if result is not None:
+                yield result
+
+
+# Read the given files into a list of documents (for small, incremental loads)
+def load_notes(file_paths: List[str]) -> List[Tuple[Document, dict]]:
+    return list(iter_notes(file_paths))
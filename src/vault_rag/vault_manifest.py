@@ -0,0 +1,118 @@
+# Tracks path, mtime, size and content hash of every note in the vault
+# The manifest is stored next to the persisted index so an update only has to
+# re-embed the notes that were added, modified or deleted since the last save
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+_MANIFEST_FILE = "manifest.json"
+
+
+@dataclass
+class VaultChanges:
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    # Manifest describing the vault after the changes are applied
+    manifest: dict = field(default_factory=dict)
+
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+# Yield the absolute path of every markdown file in the vault
+def iter_vault_files(vault_path: str) -> Iterator[str]:
+    vault = Path(vault_path).absolute()
+    for file_path in vault.rglob("*.md"):
+        # Hidden folders (.obsidian, .trash, ...) are skipped by the reader as well
+        if any(part.startswith(".") for part in file_path.relative_to(vault).parts):
+            continue
+        if file_path.is_file():
+            yield str(file_path)
+
+
+# Hash the content of a file
+def hash_file(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hash_bytes(f.read())
+
+
+# Hash raw note content (same hash as hash_file for the written bytes)
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# Build a manifest entry for a single file
+def manifest_entry(file_path: str, content_hash: Optional[str] = None) -> dict:
+    stat = os.stat(file_path)
+    return {
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "hash": content_hash or hash_file(file_path),
+    }
+
+
+# Compare the vault on disk with a previous manifest
+def diff_vault(vault_path: str, old_manifest: dict) -> VaultChanges:
+    changes = VaultChanges()
+
+    for file_path in iter_vault_files(vault_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+
+        old_entry = old_manifest.get(file_path)
+
+        # Same mtime and size: trust the old hash without reading the file
+        if (
+            old_entry is not None
+            and old_entry["mtime"] == stat.st_mtime
+            and old_entry["size"] == stat.st_size
+        ):
+            changes.manifest[file_path] = old_entry
+            continue
+
+        try:
+            content_hash = hash_file(file_path)
+        except OSError:
+            continue
+
+        changes.manifest[file_path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "hash": content_hash,
+        }
+
+        if old_entry is None:
+            changes.added.append(file_path)
+        elif old_entry["hash"] != content_hash:
+            changes.modified.append(file_path)
+        # Otherwise the file was only touched, nothing to re-embed
+
+    changes.deleted = [path for path in old_manifest if path not in changes.manifest]
+    return changes
+
+
+# Load the manifest stored next to the index, empty if missing or unreadable
+def load_manifest(index_dir: Path) -> dict:
+    manifest_file = index_dir / _MANIFEST_FILE
+    if not manifest_file.exists():
+        return {}
+
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+# Save the manifest next to the index
+def save_manifest(index_dir: Path, manifest: dict) -> None:
+    index_dir.mkdir(parents=True, exist_ok=True)
+    with open(index_dir / _MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
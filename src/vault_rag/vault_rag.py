@@ -4,23 +4,79 @@
 
 import os
 import logging
+import threading
+import time
 import warnings
+from dataclasses import replace
 from pathlib import Path
-from typing import Optional
+from itertools import batched
+from typing import Callable, List, Optional
 
 from llama_index.core import (
+    Document,
     VectorStoreIndex,
-    SimpleDirectoryReader,
     Settings,
     StorageContext,
+    load_index_from_storage,
+    get_response_synthesizer,
 )
 from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.indices.utils import embed_nodes
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.schema import QueryBundle
 from llama_index.core.storage.docstore import SimpleDocumentStore
 from llama_index.core.storage.index_store import SimpleIndexStore
-from llama_index.core.vector_stores import SimpleVectorStore
 from rich.console import Console
 from rich.markdown import Markdown
+from .index_storage import (
+    IndexLock,
+    get_index_dir,
+    is_index_valid,
+    read_index_meta,
+    write_index_meta,
+    clear_index,
+    get_staging_dir,
+    replace_index,
+)
+from ..env_setup import get_data_dir
+from ..instrumentation import record_api_call, span, timed_iter, traced
+from .answer_cache import AnswerCache, answer_sources
+from .answer_rendering import (
+    NO_ANSWER,
+    answer_or_default,
+    print_answer_stats,
+    stream_markdown,
+)
+from .context_packer import DEFAULT_CONTEXT_TOKEN_BUDGET, pack_context
+from .embedding_cache import CachedEmbedding, EmbeddingCache
+from .embedding_pipeline import PipelinedOpenAIEmbedding
+from .hybrid_retriever import HybridRetriever
+from .keyword_index import KEYWORD_INDEX_FILE, KeywordIndex
+from .obsidian_parser import ObsidianMarkdownNodeParser
+from .query_token_counter import QueryTokenCounter
+from .vault_watcher import VaultWatcher
+from .vector_stores import (
+    create_vector_store,
+    load_vector_store,
+    select_vector_backend,
+)
+from .vault_loader import iter_notes, load_notes, make_note_document
+from .vault_manifest import (
+    VaultChanges,
+    diff_vault,
+    hash_bytes,
+    iter_vault_files,
+    load_manifest,
+    manifest_entry,
+    save_manifest,
+)
+
+# Embedding model used for the index (part of the persisted index key)
+EMBED_MODEL = "text-embedding-3-small"
+
+# Documents chunked and embedded together during a full build
+_BUILD_BATCH_SIZE = 64
 
 # Disable HTTP request logging
 logging.getLogger("openai").setLevel(logging.WARNING)
@@ -42,6 +98,64 @@ class VaultRAG:
         self.llm_model = llm_model
         # The actual RAG index (starts as None, built later)
         self.index: Optional[VectorStoreIndex] = None
+        # Folder where the index is persisted between sessions
+        self.index_dir = get_index_dir(vault_path, EMBED_MODEL)
+        # Path -> {mtime, size, hash} of every note currently in the index
+        self.manifest: dict = {}
+        # Vector store backend: auto (by vault size), simple, numpy or hnsw
+        self.preferred_vector_backend = os.getenv("VECTOR_BACKEND", "auto").lower()
+        # Backend of the current index (set when it is built or loaded)
+        self.vector_backend: Optional[str] = None
+        # On-disk scan precision of the numpy backend: int8, float16 or none
+        self.vector_quantization = os.getenv("VECTOR_QUANTIZATION", "int8").lower()
+        # BM25 index over the same chunks, updated together with the vector index
+        self.keyword_index: Optional[KeywordIndex] = None
+        # How chunks are retrieved: hybrid (vector + keyword), vector or keyword
+        self.retrieval_mode = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+        # Incremented whenever the index content changes (build, update, insert)
+        self.index_version = 0
+        # Retrievers and synthesizers reused until the index version changes
+        self._query_objects: dict = {}
+        self._query_objects_version = -1
+        # Answers to earlier questions, reused while the vault is unchanged
+        # (ANSWER_CACHE_TTL_HOURS=0 disables the cache)
+        ttl_hours = float(os.getenv("ANSWER_CACHE_TTL_HOURS", "168"))
+        self.answer_cache: Optional[AnswerCache] = (
+            AnswerCache(
+                get_data_dir() / "answer_cache.sqlite3", ttl_seconds=ttl_hours * 3600
+            )
+            if ttl_hours > 0
+            else None
+        )
+        # Chunks retrieved per question
+        self.similarity_top_k = int(os.getenv("SIMILARITY_TOP_K", "5"))
+        # How answers are synthesized: compact (one LLM call over the chunks packed
+        # into the context token budget) or tree_summarize (several calls)
+        self.response_mode = os.getenv("RESPONSE_MODE", "compact").lower()
+        self.context_token_budget = int(
+            os.getenv("CONTEXT_TOKEN_BUDGET", str(DEFAULT_CONTEXT_TOKEN_BUDGET))
+        )
+        # Counts LLM calls and tokens of the answer synthesis, per query
+        self.token_counter = QueryTokenCounter()
+        # Minimum query embedding similarity to reuse the answer of a differently
+        # worded question (0 disables near-duplicate matching)
+        self.answer_cache_similarity = float(
+            os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")
+        )
+        # Serializes writers (build, update, insert) against each other, also in
+        # other processes using the same index folder
+        self._update_lock = IndexLock(
+            self.index_dir,
+            on_wait=lambda: Console().print(
+                "[dim italic]Waiting for another process updating the RAG index...[/dim italic]"
+            ),
+        )
+        # Meta file of the saved index the one in memory was loaded from or saved
+        # as, tells if another process saved the index since
+        self._index_meta: Optional[dict] = None
+        # Held by queries and by the short step that swaps nodes in the index,
+        # so a query always sees the index either before or after an update
+        self._index_lock = threading.RLock()
         # Set up LlamaIndex configuration
         self._setup_llama_config()
 
@@ -54,108 +168,536 @@ class VaultRAG:
             temperature=0.1,  # Low temperature for more consistent answers
         )
 
-        # Set up OpenAI embeddings (converts text to searchable vectors)
-        Settings.embed_model = OpenAIEmbedding(
-            model="text-embedding-3-small", api_key=self.api_key
+        # Set up OpenAI embeddings (converts text to searchable vectors), sent as
+        # concurrent batched requests, with unchanged chunks served from the cache
+        self.embedder = PipelinedOpenAIEmbedding(
+            model=EMBED_MODEL, api_key=self.api_key
         )
-
-    # Load documents from the Obsidian vault
-    def _load_documents(self):
-        # Load all markdown files from the vault
-        reader = SimpleDirectoryReader(
-            input_dir=str(self.vault_path),
-            required_exts=[".md"],  # Only process .md files
-            recursive=True,  # Include subfolders
+        Settings.embed_model = CachedEmbedding(
+            self.embedder,
+            EmbeddingCache(get_data_dir() / "embedding_cache.sqlite3"),
         )
 
-        documents = reader.load_data()
-
-        # Import here to avoid circular imports
-        from rich.console import Console
-
-        console = Console()
-        console.print(f"[dim italic]Loaded {len(documents)} documents[/dim italic]")
-
-        if len(documents) == 0:
-            console.print(
-                "[red]WARNING: No documents loaded! Check your vault path.[/red]"
-            )
+        # Chunk notes along their headings, with frontmatter tags as metadata
+        Settings.transformations = [ObsidianMarkdownNodeParser()]
+
+    # Load the persisted index from disk
+    @traced("load_persisted_index")
+    # (returns the index, its keyword index and its meta file)
+    def _load_persisted_index(self) -> tuple[VectorStoreIndex, KeywordIndex, dict]:
+        persist_dir = str(self.index_dir)
+        meta = read_index_meta(self.index_dir)
+        self.vector_backend = meta["vector_backend"]
+        keyword_file = self.index_dir / KEYWORD_INDEX_FILE
+        if not keyword_file.exists():
+            raise FileNotFoundError(f"Keyword index missing: {keyword_file}")
+        storage_context = StorageContext.from_defaults(
+            docstore=SimpleDocumentStore.from_persist_dir(persist_dir),
+            vector_store=load_vector_store(self.vector_backend, persist_dir),
+            index_store=SimpleIndexStore.from_persist_dir(persist_dir),
+        )
+        index = load_index_from_storage(storage_context)
+        return index, KeywordIndex(keyword_file), meta
+
+    # Check if the saved index can be loaded instead of building a new one
+    # (an explicitly configured backend must match the persisted one)
+    def _is_saved_index_valid(self) -> bool:
+        backend = self.preferred_vector_backend
+        return is_index_valid(
+            self.index_dir,
+            str(self.vault_path),
+            EMBED_MODEL,
+            None if backend == "auto" else backend,
+        )
 
-        return documents
+    # Continue from the saved index if another process saved it since the one in
+    # memory was loaded or saved, so its changes are neither redone nor overwritten
+    # (called by writers, with the update lock held)
+    def _reload_if_saved_elsewhere(self) -> None:
+        meta = read_index_meta(self.index_dir)
+        if (
+            self._index_meta is None
+            or meta is None
+            or meta.get("save_id") == self._index_meta.get("save_id")
+            or not self._is_saved_index_valid()
+        ):
+            return
+        try:
+            index, keyword_index, meta = self._load_persisted_index()
+            manifest = load_manifest(self.index_dir)
+        except Exception as e:
+            Console().print(f"[yellow]Could not load the saved RAG index: {e}[/yellow]")
+            return
+        with self._index_lock:
+            self._close_keyword_index()
+            self.index, self.keyword_index = index, keyword_index
+            self.manifest = manifest
+            self._bump_index_version()
+        self._index_meta = meta
+
+    # Persist the current index to disk together with the vault manifest
+    @traced("persist_index")
+    def _persist_index(self):
+        # The numpy backend swaps in its freshly written memory-mapped files here
+        with self._index_lock:
+            self.index.storage_context.persist(persist_dir=str(self.index_dir))
+            # A keyword index kept in memory (see rebuild_index) is saved with it
+            keyword_file = self.index_dir / KEYWORD_INDEX_FILE
+            if self.keyword_index.db_path != keyword_file:
+                keyword_index = KeywordIndex(keyword_file)
+                self.keyword_index.copy_to(keyword_index)
+                self._close_keyword_index()
+                self.keyword_index = keyword_index
+                self._bump_index_version()
+        self._index_meta = self._save_index_meta(self.index_dir, self.manifest)
+
+    # Write the manifest and meta file next to an index persisted in index_dir
+    # (the meta file last, it marks the index as complete), returns the meta
+    def _save_index_meta(self, index_dir: Path, manifest: dict) -> dict:
+        save_manifest(index_dir, manifest)
+        return write_index_meta(
+            index_dir, str(self.vault_path), EMBED_MODEL, self.vector_backend
+        )
 
-    # Force rebuild of the RAG index (useful when new files are added)
+    # Force rebuild of the RAG index, discarding the persisted copy
+    # The new index is built and saved in a staging folder while queries keep using
+    # the current one, then swapped in while queries are paused. If it cannot be
+    # saved, the persisted copy is kept and the new index is only used in memory
+    # (its keyword index too) until a later update saves it
+    @traced("rebuild_index")
     def rebuild_index(self):
         console = Console()
         console.print("[dim italic]Rebuilding RAG index...[/dim italic]")
-        self.index = None
-        self.build_rag()
+        with self._update_lock:
+            staging_dir = get_staging_dir(self.index_dir)
+            clear_index(staging_dir)
+            index, manifest, keyword_index = self._build_from_vault(staging_dir)
+            try:
+                index.storage_context.persist(persist_dir=str(staging_dir))
+                meta = self._save_index_meta(staging_dir, manifest)
+                saved = True
+            except OSError as e:
+                console.print(f"[yellow]Could not save RAG index: {e}[/yellow]")
+                saved = False
+
+            if saved:
+                # Reopened from its final place after the swap
+                keyword_index.close()
+            else:
+                # The persisted copy stays in place, the new keyword index is
+                # kept in memory until it can be saved (see _persist_index)
+                in_memory = KeywordIndex(Path(":memory:"))
+                keyword_index.copy_to(in_memory)
+                keyword_index.close()
+                clear_index(staging_dir)
+                keyword_index = in_memory
+
+            with self._index_lock:
+                self._close_keyword_index()
+                if saved:
+                    replace_index(staging_dir, self.index_dir)
+                    keyword_index = KeywordIndex(self.index_dir / KEYWORD_INDEX_FILE)
+                    self._index_meta = meta
+                self.keyword_index = keyword_index
+                self.index, self.manifest = index, manifest
+                self._bump_index_version()
         console.print("[dim italic]RAG index rebuilt![/dim italic]")
 
-    # Build the RAG index from vault documents
-    def build_rag(self):
-        # If already built, just return it (avoid rebuilding)
-        if self.index is not None:
-            return self.index
+    def _bump_index_version(self):
+        with self._index_lock:
+            self.index_version += 1
+
+    # Get a retriever or synthesizer built for the current index version
+    # (created by factory on first use after the index changed)
+    def _get_query_object(self, key: tuple, factory):
+        with self._index_lock:
+            if self._query_objects_version != self.index_version:
+                self._query_objects = {}
+                self._query_objects_version = self.index_version
+            if key not in self._query_objects:
+                self._query_objects[key] = factory()
+            return self._query_objects[key]
+
+    def _get_retriever(self, top_k: int, mode: str) -> HybridRetriever:
+        return self._get_query_object(
+            ("retriever", top_k, mode),
+            lambda: HybridRetriever(
+                self.index, self.keyword_index, similarity_top_k=top_k, mode=mode
+            ),
+        )
 
-        # Load all documents from the vault
-        documents = self._load_documents()
+    # Answer cache scope: the vault and every setting that shapes an answer (the
+    # notes an answer was built from are checked per entry)
+    def _answer_scope(self, mode: str) -> str:
+        settings = (
+            f"{mode}/{self.response_mode}/top_k={self.similarity_top_k}"
+            f"/budget={self.context_token_budget}"
+        )
+        return AnswerCache.make_scope(str(self.vault_path), self.llm_model, settings)
+
+    def _get_synthesizer(self, stream: bool):
+        return self._get_query_object(
+            ("synthesizer", stream),
+            lambda: get_response_synthesizer(
+                response_mode=self.response_mode,
+                streaming=stream,
+                # Also becomes the callback manager of the LLM it calls
+                callback_manager=CallbackManager([self.token_counter]),
+            ),
+        )
 
-        # Build index fresh every time (no caching for now)
-        self.index = VectorStoreIndex.from_documents(documents)
-        return self.index
+    def _close_keyword_index(self):
+        if self.keyword_index is not None:
+            self.keyword_index.close()
+            self.keyword_index = None
+
+    # Split documents into nodes and embed them (no index lock needed)
+    @traced("embed_documents")
+    def _embed_documents(self, documents: List[Document]) -> list:
+        nodes = run_transformations(documents, Settings.transformations)
+        id_to_embedding = embed_nodes(nodes, Settings.embed_model)
+        for node in nodes:
+            node.embedding = id_to_embedding[node.node_id]
+        return nodes
+
+    # Swap old documents for new, already embedded nodes while queries are paused
+    # (the manifest describing the new index content is swapped in the same step)
+    def _replace_documents(
+        self,
+        removed_ids: List[str],
+        documents: List[Document],
+        nodes: list,
+        manifest: dict,
+    ) -> None:
+        with self._index_lock:
+            for doc_id in removed_ids:
+                self.index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            self.index.insert_nodes(nodes)
+            for document in documents:
+                self.index.docstore.set_document_hash(document.id_, document.hash)
+            self.keyword_index.replace_documents(removed_ids, nodes)
+            self.manifest = manifest
+            self._bump_index_version()
+
+    # Bring the index up to date by re-embedding only the notes that changed
+    @traced("update_index")
+    def update_index(self, quiet: bool = False) -> VaultChanges:
+        with self._update_lock:
+            if self.index is None:
+                self.build_rag()
+            self._reload_if_saved_elsewhere()
+
+            changes = diff_vault(str(self.vault_path), self.manifest)
+            if not changes.has_changes():
+                return changes
 
-    # Query the RAG system with a question about your vault content
-    def query(self, prompt: str) -> dict:
-        # Build RAG if not already done
-        if self.index is None:
-            self.build_rag()
+            console = Console()
+            if not quiet:
+                console.print(
+                    f"[dim italic]Updating RAG index: {len(changes.added)} added, "
+                    f"{len(changes.modified)} modified, {len(changes.deleted)} deleted[/dim italic]"
+                )
 
-        try:
-            # Create a query engine from the index
-            query_engine = self.index.as_query_engine(
-                similarity_top_k=5,  # Return top 5 most relevant chunks
-                response_mode="tree_summarize",
+            # Embed the new versions of added and modified notes
+            notes = load_notes(changes.added + changes.modified)
+            documents = [document for document, _ in notes]
+            nodes = self._embed_documents(documents)
+
+            # Manifest entries describe exactly the content that was indexed
+            for document, entry in notes:
+                changes.manifest[document.id_] = entry
+
+            # Drop the old nodes of modified and deleted notes, add the new ones
+            self._replace_documents(
+                changes.modified + changes.deleted, documents, nodes, changes.manifest
             )
 
-            # Add instruction to format response as markdown
-            markdown_prompt = f"{prompt}\n\nPlease format your response using markdown syntax (headers, lists, bold text, etc.) for better readability."
+            try:
+                self._persist_index()
+            except OSError as e:
+                if not quiet:
+                    console.print(f"[yellow]Could not save RAG index: {e}[/yellow]")
+
+            return changes
+
+    # Insert a note whose markdown is already in memory, without rescanning the vault
+    @traced("insert_note")
+    def insert_note(self, file_path: str, markdown: str) -> None:
+        with self._update_lock:
+            if self.index is None:
+                self.build_rag()
+            self._reload_if_saved_elsewhere()
+
+            # Same id and metadata as documents loaded from the vault
+            file_path = str(Path(file_path).absolute())
+            document = make_note_document(file_path, markdown)
+
+            # Overwriting an existing note replaces its old nodes
+            nodes = self._embed_documents([document])
+            removed_ids = [file_path] if file_path in self.manifest else []
+            manifest = dict(self.manifest)
+            manifest[file_path] = manifest_entry(
+                file_path, hash_bytes(markdown.encode("utf-8"))
+            )
+            self._replace_documents(removed_ids, [document], nodes, manifest)
+
+            try:
+                self._persist_index()
+            except OSError as e:
+                Console().print(f"[yellow]Could not save RAG index: {e}[/yellow]")
+
+    # Build a new index from all vault notes, streaming files in while earlier
+    # batches are chunked and embedded (its keyword index is written to index_dir).
+    # The time spent waiting for note reads is recorded as load_documents
+    @traced("build_from_vault")
+    def _build_from_vault(
+        self, index_dir: Path
+    ) -> tuple[VectorStoreIndex, dict, KeywordIndex]:
+        file_paths = list(iter_vault_files(str(self.vault_path)))
+
+        # Backend is chosen from the vault size unless configured explicitly
+        self.vector_backend = select_vector_backend(
+            self.preferred_vector_backend, len(file_paths)
+        )
+        storage_context = StorageContext.from_defaults(
+            vector_store=create_vector_store(
+                self.vector_backend, self.vector_quantization
+            )
+        )
+        index = VectorStoreIndex(nodes=[], storage_context=storage_context)
+        keyword_index = KeywordIndex(index_dir / KEYWORD_INDEX_FILE)
+        keyword_index.clear()
+        manifest = {}
+        stats_before = replace(self.embedder.stats)
+
+        notes = timed_iter("load_documents", iter_notes(file_paths))
+        for batch in batched(notes, _BUILD_BATCH_SIZE):
+            documents = [document for document, _ in batch]
+            nodes = self._embed_documents(documents)
+            index.insert_nodes(nodes)
+            keyword_index.replace_documents([], nodes)
+
+            for document, entry in batch:
+                index.docstore.set_document_hash(document.id_, document.hash)
+                manifest[document.id_] = entry
 
-            # Query the engine and get response
-            response = query_engine.query(markdown_prompt)
-            response_str = str(response).strip()
+        console = Console()
+        console.print(f"[dim italic]Loaded {len(manifest)} documents[/dim italic]")
+        stats = self.embedder.stats.since(stats_before)
+        if stats.chunks:
+            console.print(
+                f"[dim italic]Embedded {stats.chunks} chunks in {stats.requests} requests "
+                f"({stats.chunks_per_second:.0f} chunks/s, "
+                f"{stats.tokens_per_second:.0f} tokens/s)[/dim italic]"
+            )
+        if len(manifest) == 0:
+            console.print(
+                "[red]WARNING: No documents loaded! Check your vault path.[/red]"
+            )
 
-            if not response_str or response_str.lower() in [
-                "empty response",
-                "none",
-                "",
-            ]:
-                response_str = (
-                    "No relevant information found in the vault for your query."
-                )
+        return index, manifest, keyword_index
+
+    # Build the RAG index from vault documents
+    @traced("build_rag")
+    def build_rag(self):
+        with self._update_lock:
+            # If already built, just return it (avoid rebuilding)
+            if self.index is not None:
+                return self.index
 
-            # Print the response as markdown
             console = Console()
-            markdown = Markdown(response_str)
-            console.print(markdown)
-            console.print()
 
-            return {"success": True, "error": None}
+            # Reuse the persisted index and only apply what changed since it was saved
+            if self._is_saved_index_valid():
+                try:
+                    self.index, self.keyword_index, self._index_meta = (
+                        self._load_persisted_index()
+                    )
+                    self._bump_index_version()
+                    self.manifest = load_manifest(self.index_dir)
+                    console.print("[dim italic]Loaded cached RAG index[/dim italic]")
+                    self.update_index()
+                    return self.index
+                except Exception as e:
+                    console.print(
+                        f"[yellow]Cached RAG index could not be loaded, rebuilding: {e}[/yellow]"
+                    )
+                    self.index = None
+
+            # Embed all documents and save the result for the next start
+            self._close_keyword_index()
+            self.index, self.manifest, self.keyword_index = self._build_from_vault(
+                self.index_dir
+            )
+            self._bump_index_version()
+            try:
+                self._persist_index()
+            except OSError as e:
+                console.print(f"[yellow]Could not save RAG index: {e}[/yellow]")
+            return self.index
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+    # Query the RAG system with a question about your vault content
+    # (mode overrides RETRIEVAL_MODE: hybrid, vector or keyword). With stream=True
+    # the answer is rendered while the LLM is still writing it and on_token gets
+    # every token as it arrives. With quiet=True nothing is printed and the caller
+    # uses the returned answer
+    def query(
+        self,
+        prompt: str,
+        mode: Optional[str] = None,
+        stream: bool = True,
+        quiet: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> dict:
+        # Build RAG if not already done
+        if self.index is None:
+            self.build_rag()
+
+        with span("query", stream=stream) as attributes:
+            try:
+                start = time.perf_counter()
+                mode = mode or self.retrieval_mode
+                console = Console(quiet=quiet)
+
+                # Embed the question before taking the index lock, so concurrent
+                # queries do not wait for each other's embedding requests
+                query_bundle = QueryBundle(prompt)
+                if mode != "keyword":
+                    with span("query.embed_question"):
+                        query_bundle.embedding = (
+                            Settings.embed_model.get_query_embedding(prompt)
+                        )
+
+                # Retrieve with the plain question (the formatting instruction would only
+                # add noise to the search) and let the LLM answer from the retrieved chunks
+                with span("query.retrieve"), self._index_lock:
+                    # Fuse vector and keyword search over the index
+                    retriever = self._get_retriever(self.similarity_top_k, mode)
+                    nodes = retriever.retrieve(query_bundle)
+                    sources = answer_sources(nodes, self.manifest)
+
+                # Serve repeated questions from the answer cache, as long as they
+                # retrieve the same, unchanged notes the answer was built from (so
+                # added and edited notes are never missed)
+                scope = self._answer_scope(mode)
+                cached_answer = None
+                if self.answer_cache is not None:
+                    cached_answer = self.answer_cache.get(scope, prompt, sources)
+                    if (
+                        cached_answer is None
+                        and self.answer_cache_similarity > 0
+                        and query_bundle.embedding is not None
+                    ):
+                        cached_answer = self.answer_cache.get_similar(
+                            scope,
+                            query_bundle.embedding,
+                            self.answer_cache_similarity,
+                            sources,
+                        )
+
+                attributes["mode"] = mode
+                attributes["cached"] = cached_answer is not None
+                if cached_answer is not None:
+                    if on_token is not None:
+                        on_token(cached_answer)
+                    console.print(Markdown(cached_answer))
+                    console.print()
+                    result = {
+                        "success": True,
+                        "error": None,
+                        "answer": cached_answer,
+                        "cached": True,
+                        "first_token_seconds": None,
+                        "total_seconds": time.perf_counter() - start,
+                        "llm_calls": 0,
+                        "prompt_tokens": 0,
+                        "completion_tokens": 0,
+                    }
+                    print_answer_stats(console, result)
+                    return result
+
+                synthesizer = self._get_synthesizer(stream)
+
+                # Add instruction to format response as markdown
+                markdown_prompt = f"{prompt}\n\nPlease format your response using markdown syntax (headers, lists, bold text, etc.) for better readability."
+
+                # Fit the chunks into one prompt so compact synthesis needs a single call
+                if self.response_mode == "compact":
+                    with span("query.pack_context"):
+                        nodes = pack_context(nodes, prompt, self.context_token_budget)
+
+                first_token_seconds = None
+                # With streaming the LLM writes while the answer is rendered, the
+                # rendering time is recorded separately (query.render)
+                with (
+                    span("query.llm", chunks=len(nodes)),
+                    self.token_counter.collect() as llm_events,
+                ):
+                    response = synthesizer.synthesize(markdown_prompt, nodes)
+                    if stream:
+                        tokens = response.response_gen
+                        if on_token is not None:
+                            tokens = _forward_tokens(tokens, on_token)
+                        # Render the answer as markdown while tokens arrive
+                        response_str, first_token_seconds = stream_markdown(
+                            console, tokens, start
+                        )
+                    else:
+                        response_str = answer_or_default(str(response))
+                        if on_token is not None:
+                            on_token(response_str)
+
+                    prompt_tokens = sum(
+                        event.prompt_token_count for event in llm_events
+                    )
+                    completion_tokens = sum(
+                        event.completion_token_count for event in llm_events
+                    )
+                    record_api_call(
+                        "llm", prompt_tokens, completion_tokens, calls=len(llm_events)
+                    )
+                if not stream:
+                    with span("query.render"):
+                        console.print(Markdown(response_str))
+                console.print()
+
+                if self.answer_cache is not None and response_str != NO_ANSWER:
+                    self.answer_cache.put(
+                        scope, prompt, response_str, sources, query_bundle.embedding
+                    )
+
+                result = {
+                    "success": True,
+                    "error": None,
+                    "answer": response_str,
+                    "cached": False,
+                    "first_token_seconds": first_token_seconds,
+                    "total_seconds": time.perf_counter() - start,
+                    "llm_calls": len(llm_events),
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                }
+                print_answer_stats(console, result)
+                return result
+
+            except Exception as e:
+                attributes["error"] = str(e)
+                return {"success": False, "error": str(e)}
 
     # Find most similar documents to given content for folder placement
-    def find_similar_documents(self, content: str, top_k: int = 3) -> list:
+    @traced("find_similar_documents")
+    def find_similar_documents(
+        self, content: str, top_k: int = 3, mode: Optional[str] = None
+    ) -> list:
         """Find most similar documents and return their file paths."""
         if self.index is None:
             self.build_rag()
 
         try:
-            # Create a retriever to get similar documents
-            retriever = self.index.as_retriever(similarity_top_k=top_k)
-
-            # Retrieve similar documents
-            nodes = retriever.retrieve(content)
+            # Retrieve similar documents (with the retriever of the current index)
+            with self._index_lock:
+                retriever = self._get_retriever(top_k, mode or self.retrieval_mode)
+                nodes = retriever.retrieve(content)
 
             # Extract file paths from the nodes
             similar_files = []
@@ -175,11 +717,41 @@ class VaultRAG:
             print(f"Error finding similar documents: {e}")
             return []
 
+    # Keyword-only search over the vault: no embedding request and no LLM call
+    # Returns the matching chunks as {file_path, heading} dicts, best match first
+    @traced("search_notes")
+    def search_notes(self, terms: str, top_k: int = 10) -> list:
+        if self.index is None:
+            self.build_rag()
+
+        with self._index_lock:
+            retriever = self._get_retriever(top_k, "keyword")
+            nodes = retriever.retrieve(terms)
+
+        return [
+            {
+                "file_path": node.metadata.get("file_path", ""),
+                "heading": node.metadata.get("heading", ""),
+            }
+            for node in nodes
+        ]
+
+
+# Pass every streamed token to on_token on its way to the renderer
+def _forward_tokens(tokens, on_token: Callable[[str], None]):
+    for token in tokens:
+        on_token(token)
+        yield token
+
 
 # Global RAG instance - singleton pattern to save memory and processing
 _vault_rag: Optional[VaultRAG] = None
 
 
+# Background watcher keeping the global RAG index live (optional)
+_vault_watcher: Optional[VaultWatcher] = None
+
+
 # Initialize the global RAG instance - call this once when your app starts
 def initialize_rag(vault_path: str, api_key: str, llm_model: str) -> VaultRAG:
     global _vault_rag
@@ -197,14 +769,27 @@ def initialize_rag(vault_path: str, api_key: str, llm_model: str) -> VaultRAG:
     return _vault_rag
 
 
+# The global RAG instance, None until initialize_rag() was called
+def get_vault_rag() -> Optional[VaultRAG]:
+    return _vault_rag
+
+
 # Simple function to query the vault once RAG is initialized
-def query_vault(prompt: str) -> dict:
+def query_vault(
+    prompt: str,
+    stream: bool = True,
+    mode: Optional[str] = None,
+    quiet: bool = False,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> dict:
     if _vault_rag is None:
         return {
             "success": False,
             "error": "RAG system not initialized. Please run initialize_rag() first.",
         }
-    return _vault_rag.query(prompt)
+    return _vault_rag.query(
+        prompt, mode=mode, stream=stream, quiet=quiet, on_token=on_token
+    )
 
 
 # Find similar documents for optimal folder placement
@@ -214,9 +799,46 @@ def find_similar_files(content: str, top_k: int = 3) -> list:
     return _vault_rag.find_similar_documents(content, top_k)
 
 
-# Rebuild the RAG index to include new files
-def rebuild_vault_index():
+# Find notes containing the given terms (keyword index only, no API calls)
+def search_vault(terms: str, top_k: int = 10) -> list:
+    if _vault_rag is None:
+        return []
+    return _vault_rag.search_notes(terms, top_k)
+
+
+# Add a freshly written note to the RAG index without rescanning the vault
+def insert_vault_note(file_path: str, markdown: str):
+    if _vault_rag is None:
+        return "RAG system not initialized. Please run initialize_rag() first."
+    _vault_rag.insert_note(file_path, markdown)
+    return "Note added to RAG index!"
+
+
+# Update the RAG index to include new or changed files (force=True re-embeds everything)
+def rebuild_vault_index(force: bool = False):
     if _vault_rag is None:
         return "RAG system not initialized. Please run initialize_rag() first."
-    _vault_rag.rebuild_index()
-    return "RAG index rebuilt successfully!"
+    if force:
+        _vault_rag.rebuild_index()
+        return "RAG index rebuilt successfully!"
+    _vault_rag.update_index()
+    return "RAG index updated successfully!"
+
+
+# Start watching the vault so edits made in Obsidian reach the index, returns the mode
+def start_vault_watcher() -> Optional[str]:
+    global _vault_watcher
+    if _vault_rag is None:
+        return None
+    if _vault_watcher is None:
+        _vault_watcher = VaultWatcher(_vault_rag)
+        _vault_watcher.start()
+    return _vault_watcher.mode
+
+
+# Stop the vault watcher if it is running
+def stop_vault_watcher():
+    global _vault_watcher
+    if _vault_watcher is not None:
+        _vault_watcher.stop()
+        _vault_watcher = None
@@ -0,0 +1,143 @@
+# Keeps the vault RAG index live while the CLI is open
+# Uses watchdog (inotify on Linux, FSEvents on macOS) when it is installed and falls
+# back to polling file stats otherwise. Changes are debounced and applied in one
+# incremental update on a background thread.
+
+import os
+import threading
+import time
+from typing import List, Optional
+
+from .vault_manifest import iter_vault_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional (pip install obsidian-ragsody[watch])
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# Returns True if a changed path can affect the index (visible .md files only)
+def _is_vault_note(vault_path: str, file_path: str) -> bool:
+    if not file_path.endswith(".md"):
+        return False
+    rel_path = os.path.relpath(file_path, vault_path)
+    return not any(part.startswith(".") for part in rel_path.split(os.sep))
+
+
+# Forwards watchdog events for vault notes to the watcher
+class _VaultEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "VaultWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(_is_vault_note(self.watcher.vault_path, path) for path in paths if path):
+            self.watcher.notify()
+
+
+class VaultWatcher:
+
+    # Watch the vault of the given VaultRAG and keep its index up to date
+    def __init__(
+        self,
+        rag,
+        debounce_seconds: float = 2.0,
+        poll_interval: float = 5.0,
+    ):
+        self.rag = rag
+        self.vault_path = str(rag.vault_path.absolute())
+        # Wait this long after the last change before updating (Obsidian saves often)
+        self.debounce_seconds = debounce_seconds
+        # Seconds between stat scans when watchdog is not available
+        self.poll_interval = poll_interval
+        # "inotify"/"fsevents"/... when watchdog is used, "polling" otherwise
+        self.mode: Optional[str] = None
+
+        self._last_change = 0.0
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._threads: List[threading.Thread] = []
+
+    # Start watching in background threads
+    def start(self) -> None:
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(
+                _VaultEventHandler(self), self.vault_path, recursive=True
+            )
+            self._observer.daemon = True
+            self._observer.start()
+            self.mode = type(self._observer).__name__.replace("Observer", "").lower()
+        else:
+            self.mode = "polling"
+            self._start_thread(self._poll_loop)
+
+        self._start_thread(self._update_loop)
+
+    # Stop watching and wait for the background threads
+    def stop(self) -> None:
+        self._stop.set()
+        self._changed.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    # Record a change; the update runs once the vault has been quiet long enough
+    def notify(self) -> None:
+        self._last_change = time.monotonic()
+        self._changed.set()
+
+    def _start_thread(self, target) -> None:
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    # Apply batched changes to the index after the debounce window
+    def _update_loop(self) -> None:
+        while not self._stop.is_set():
+            self._changed.wait()
+            if self._stop.is_set():
+                return
+
+            # Debounce: keep waiting while changes keep coming in
+            while True:
+                remaining = self._last_change + self.debounce_seconds - time.monotonic()
+                if remaining <= 0 or self._stop.wait(remaining):
+                    break
+            if self._stop.is_set():
+                return
+
+            self._changed.clear()
+            try:
+                self.rag.update_index(quiet=True)
+            except Exception:
+                # Keep watching and retry later (e.g. embedding API unreachable)
+                self._last_change = time.monotonic() + self.poll_interval
+                self._changed.set()
+
+    # Fallback: compare (mtime, size) of every note between scans
+    def _poll_loop(self) -> None:
+        snapshot = self._scan()
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            if current != snapshot:
+                snapshot = current
+                self.notify()
+
+    def _scan(self) -> dict:
+        stats = {}
+        for file_path in iter_vault_files(self.vault_path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            stats[file_path] = (stat.st_mtime, stat.st_size)
+        return stats
@@ -0,0 +1,599 @@
+# Local vector store backends for the vault index
+# - "simple": LlamaIndex SimpleVectorStore (Python lists, brute force, JSON on disk)
+# - "numpy":  memory-mapped matrix (float16/int8 scan + float32 rescoring), .npy files
+# - "hnsw":   approximate nearest neighbour graph (needs hnswlib), for large vaults
+# With "auto" the backend is picked from the vault size: exact search while a
+# brute-force scan stays within a few milliseconds, HNSW above that.
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from pydantic import PrivateAttr
+
+try:
+    import hnswlib
+except ImportError:  # hnswlib is optional (pip install obsidian-ragsody[ann])
+    hnswlib = None
+
+VECTOR_BACKENDS = ["simple", "numpy", "hnsw"]
+
+# Above this many notes exact search gets slow enough to switch to HNSW
+# (~1.5 chunks per note, 1536 dims: ~75k vectors scan in ~20 ms)
+HNSW_MIN_NOTES = 50_000
+
+QUANTIZATIONS = ["int8", "float16", "none"]
+
+_IDS_FILE = "vector_ids.json"
+_MATRIX_FILE = "vectors.npy"
+_SCAN_FILE = "vectors_scan.npy"
+_SCALES_FILE = "vectors_scale.npy"
+_DELTA_FILE = "vectors_delta.npy"
+_HNSW_FILE = "vectors.hnsw"
+
+# Rows scored per step; small chunks keep the float32 copy of the scan matrix in
+# CPU cache, which makes the int8 scan about as fast as a float32 one
+_SCAN_CHUNK_ROWS = 256
+
+# Rows copied per step when writing the matrices to disk
+_COPY_CHUNK_ROWS = 8192
+
+# Persists only write the rows added since the matrices were last written, until
+# the added plus deleted rows exceed this share of them (or _COMPACT_MIN_ROWS);
+# then the matrices are rewritten without the deleted rows
+_COMPACT_RATIO = 0.1
+_COMPACT_MIN_ROWS = 1024
+
+
+# Pick the backend to build a new index with
+def select_vector_backend(preferred: str, num_notes: int) -> str:
+    if preferred not in VECTOR_BACKENDS + ["auto"]:
+        raise ValueError(
+            f"Unknown vector backend '{preferred}', use one of: auto, "
+            + ", ".join(VECTOR_BACKENDS)
+        )
+    if preferred == "hnsw" and hnswlib is None:
+        raise ValueError("Vector backend 'hnsw' needs hnswlib (pip install hnswlib)")
+    if preferred != "auto":
+        return preferred
+
+    if num_notes >= HNSW_MIN_NOTES and hnswlib is not None:
+        return "hnsw"
+    return "numpy"
+
+
+# Create an empty vector store for the given backend
+def create_vector_store(
+    backend: str, quantization: str = "int8"
+) -> BasePydanticVectorStore:
+    if backend == "numpy":
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization '{quantization}', use one of: "
+                + ", ".join(QUANTIZATIONS)
+            )
+        return NumpyVectorStore(quantization=quantization)
+    if backend == "hnsw":
+        return HnswVectorStore()
+    return SimpleVectorStore()
+
+
+# Load the vector store of the given backend from a persist dir
+def load_vector_store(backend: str, persist_dir: str) -> BasePydanticVectorStore:
+    if backend == "numpy":
+        return NumpyVectorStore.from_persist_dir(persist_dir)
+    if backend == "hnsw":
+        return HnswVectorStore.from_persist_dir(persist_dir)
+    return SimpleVectorStore.from_persist_dir(persist_dir)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# Cosine search over contiguous on-disk matrices
+# The persisted index is memory-mapped: a full precision float32 matrix plus a
+# compact scan copy (float16, or int8 with one scale per row). Queries scan the
+# compact copy and rescore only the best candidates in full precision. Rows added
+# since the matrices were written live in a small delta, kept in memory and saved
+# to its own file, and are merged into the matrices once it grows too large.
+class NumpyVectorStore(BasePydanticVectorStore):
+    stores_text: bool = False
+    # "int8", "float16" or "none" (scan the float32 matrix directly)
+    quantization: str = "int8"
+    # Candidates rescored in full precision per requested result
+    rescore_factor: int = 4
+
+    # Persisted, memory-mapped segment
+    _node_ids: List[str] = PrivateAttr(default_factory=list)
+    _ref_doc_ids: List[str] = PrivateAttr(default_factory=list)
+    _full: Optional[np.ndarray] = PrivateAttr(default=None)
+    _scan: Optional[np.ndarray] = PrivateAttr(default=None)
+    _scales: Optional[np.ndarray] = PrivateAttr(default=None)
+    _deleted: set = PrivateAttr(default_factory=set)
+    # Rows added since the matrices were written (normalized float32)
+    _delta: List[np.ndarray] = PrivateAttr(default_factory=list)
+    _delta_node_ids: List[str] = PrivateAttr(default_factory=list)
+    _delta_ref_doc_ids: List[str] = PrivateAttr(default_factory=list)
+    # Dir the memory-mapped matrices were loaded from, the number of persists
+    # done there and the names of the files they wrote
+    _persist_dir: Optional[Path] = PrivateAttr(default=None)
+    _generation: int = PrivateAttr(default=0)
+    _files: Dict[str, str] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        for node in nodes:
+            vector = np.asarray(node.get_embedding(), dtype=np.float32)
+            self._delta.append(_normalize(vector))
+            self._delta_node_ids.append(node.node_id)
+            self._delta_ref_doc_ids.append(node.ref_doc_id or node.node_id)
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._delete_where(lambda node_id, ref: ref == ref_doc_id)
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Any = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        removed = set(node_ids or [])
+        self._delete_where(lambda node_id, ref: node_id in removed)
+
+    def clear(self) -> None:
+        self._node_ids, self._ref_doc_ids, self._deleted = [], [], set()
+        self._full = self._scan = self._scales = None
+        self._delta, self._delta_node_ids, self._delta_ref_doc_ids = [], [], []
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None:
+            raise ValueError("Metadata filters are not supported by this backend")
+
+        query_vector = _normalize(np.asarray(query.query_embedding, dtype=np.float32))
+        top_k = query.similarity_top_k
+        allowed = None
+        if query.node_ids is not None or query.doc_ids is not None:
+            allowed_nodes = set(query.node_ids or [])
+            allowed_docs = set(query.doc_ids or [])
+
+            def allowed(node_id: str, ref: str) -> bool:
+                return node_id in allowed_nodes or ref in allowed_docs
+
+        candidates = []  # (score, node_id)
+
+        # Persisted rows: approximate scan, then exact rescoring of the best ones
+        if self._full is not None and len(self._node_ids):
+            scores = self._scan_scores(query_vector)
+            excluded = set(self._deleted)
+            if allowed is not None:
+                excluded.update(
+                    i
+                    for i, (node_id, ref) in enumerate(
+                        zip(self._node_ids, self._ref_doc_ids)
+                    )
+                    if not allowed(node_id, ref)
+                )
+            if excluded:
+                scores[list(excluded)] = -np.inf
+
+            rows = _top_k(scores, top_k * self.rescore_factor)
+            rows = [row for row in rows if np.isfinite(scores[row])]
+            if rows:
+                exact = np.asarray(self._full[sorted(rows)]) @ query_vector
+                candidates.extend(
+                    (float(score), self._node_ids[row])
+                    for row, score in zip(sorted(rows), exact)
+                )
+
+        # Rows added since the last save are scored exactly
+        if self._delta:
+            exact = np.vstack(self._delta) @ query_vector
+            candidates.extend(
+                (float(score), node_id)
+                for score, node_id, ref in zip(
+                    exact, self._delta_node_ids, self._delta_ref_doc_ids
+                )
+                if allowed is None or allowed(node_id, ref)
+            )
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        candidates = candidates[:top_k]
+        return VectorStoreQueryResult(
+            nodes=None,
+            similarities=[score for score, _ in candidates],
+            ids=[node_id for _, node_id in candidates],
+        )
+
+    # Files are named after the persist (generation) that wrote them and only used
+    # once the ids file naming them is swapped in, so an interrupted persist
+    # leaves the previous index readable
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        persist_dir = Path(persist_path).parent.resolve()
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        dim = self._dim()
+        self._generation += 1
+
+        compact = self._needs_compaction(persist_dir)
+        if compact:
+            self._compact(persist_dir, dim)
+        self._files.pop("delta", None)
+        if self._delta:
+            self._files["delta"] = _generation_name(_DELTA_FILE, self._generation)
+            _save_npy(persist_dir / self._files["delta"], np.vstack(self._delta))
+        self._write_ids(persist_dir, dim)
+        _remove_unused_files(persist_dir, self._files.values())
+
+        # Continue from the freshly written, memory-mapped matrices
+        if compact:
+            self._load(persist_dir)
+
+    # Rewrite the matrices unless they are in persist_dir and the delta is small
+    def _needs_compaction(self, persist_dir: Path) -> bool:
+        if self._full is None or persist_dir != self._persist_dir:
+            return True
+        changed = len(self._deleted) + len(self._delta_node_ids)
+        return changed > max(_COMPACT_MIN_ROWS, _COMPACT_RATIO * len(self._node_ids))
+
+    # Write the kept matrix rows followed by the delta as new matrices
+    def _compact(self, persist_dir: Path, dim: int) -> None:
+        keep = [i for i in range(len(self._node_ids)) if i not in self._deleted]
+        count = len(keep) + len(self._delta_node_ids)
+        self._files = (
+            self._write_matrices(persist_dir, keep, count, dim) if count else {}
+        )
+        self._node_ids = [self._node_ids[i] for i in keep] + self._delta_node_ids
+        self._ref_doc_ids = [
+            self._ref_doc_ids[i] for i in keep
+        ] + self._delta_ref_doc_ids
+        self._deleted = set()
+        self._delta, self._delta_node_ids, self._delta_ref_doc_ids = [], [], []
+
+    # Write the ids of the matrix and delta rows and the files holding them
+    def _write_ids(self, persist_dir: Path, dim: int) -> None:
+        tmp_path = persist_dir / (_IDS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "count": len(self._node_ids),
+                    "dim": dim,
+                    "quantization": self.quantization,
+                    "generation": self._generation,
+                    "files": self._files,
+                    "node_ids": self._node_ids,
+                    "ref_doc_ids": self._ref_doc_ids,
+                    "deleted": sorted(self._deleted),
+                    "delta_node_ids": self._delta_node_ids,
+                    "delta_ref_doc_ids": self._delta_ref_doc_ids,
+                },
+                f,
+            )
+        os.replace(tmp_path, persist_dir / _IDS_FILE)
+
+    # Write the float32 matrix and its scan copy for the kept rows plus the delta
+    # Returns the names of the written files
+    def _write_matrices(
+        self, persist_dir: Path, keep: List[int], count: int, dim: int
+    ) -> Dict[str, str]:
+        files = {"matrix": _generation_name(_MATRIX_FILE, self._generation)}
+        full = _open_memmap(
+            persist_dir / (files["matrix"] + ".tmp"), np.float32, count, dim
+        )
+        scan_dtype = {"float16": np.float16, "int8": np.int8}.get(self.quantization)
+        scan = scales = None
+        if scan_dtype is not None:
+            files["scan"] = _generation_name(_SCAN_FILE, self._generation)
+            scan = _open_memmap(
+                persist_dir / (files["scan"] + ".tmp"), scan_dtype, count, dim
+            )
+        if self.quantization == "int8":
+            files["scales"] = _generation_name(_SCALES_FILE, self._generation)
+            scales = np.zeros(count, dtype=np.float32)
+
+        # Copy in chunks so the matrix never has to be fully in memory
+        for start, rows in self._iter_rows(keep):
+            end = start + len(rows)
+            full[start:end] = rows
+            if self.quantization == "float16":
+                scan[start:end] = rows.astype(np.float16)
+            elif self.quantization == "int8":
+                row_scales = np.abs(rows).max(axis=1) / 127.0
+                row_scales[row_scales == 0] = 1.0
+                scan[start:end] = np.round(rows / row_scales[:, None]).astype(np.int8)
+                scales[start:end] = row_scales
+
+        for matrix in (full, scan):
+            if matrix is not None:
+                matrix.flush()
+        del full, scan
+
+        for name in ("matrix", "scan"):
+            if name in files:
+                os.replace(
+                    persist_dir / (files[name] + ".tmp"), persist_dir / files[name]
+                )
+        if scales is not None:
+            _save_npy(persist_dir / files["scales"], scales)
+        return files
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str) -> "NumpyVectorStore":
+        with open(Path(persist_dir) / _IDS_FILE, "r", encoding="utf-8") as f:
+            quantization = json.load(f)["quantization"]
+        store = cls(quantization=quantization)
+        store._load(Path(persist_dir).resolve())
+        return store
+
+    # Memory-map the persisted matrices and read the delta
+    def _load(self, persist_dir: Path) -> None:
+        with open(persist_dir / _IDS_FILE, "r", encoding="utf-8") as f:
+            ids = json.load(f)
+
+        self.clear()
+        self._persist_dir = persist_dir
+        self._generation = ids.get("generation", 0)
+        # Indexes saved before files had generations use the plain names
+        self._files = ids.get(
+            "files",
+            {"matrix": _MATRIX_FILE, "scan": _SCAN_FILE, "scales": _SCALES_FILE},
+        )
+        self._node_ids = ids["node_ids"]
+        self._ref_doc_ids = ids["ref_doc_ids"]
+        self._deleted = set(ids.get("deleted", []))
+        if "delta" in self._files:
+            delta = np.load(persist_dir / self._files["delta"])
+            if len(delta) != len(ids["delta_node_ids"]):
+                raise ValueError(f"{self._files['delta']} does not match {_IDS_FILE}")
+            self._delta = list(delta)
+            self._delta_node_ids = ids["delta_node_ids"]
+            self._delta_ref_doc_ids = ids["delta_ref_doc_ids"]
+        if ids["count"] == 0:
+            return
+
+        self._full = np.load(persist_dir / self._files["matrix"], mmap_mode="r")
+        if self.quantization in ("float16", "int8"):
+            self._scan = np.load(persist_dir / self._files["scan"], mmap_mode="r")
+        if self.quantization == "int8":
+            self._scales = np.load(persist_dir / self._files["scales"])
+        if len(self._full) != ids["count"]:
+            raise ValueError(f"{self._files['matrix']} does not match {_IDS_FILE}")
+
+    def _dim(self) -> int:
+        if self._full is not None:
+            return self._full.shape[1]
+        if self._delta:
+            return len(self._delta[0])
+        return 0
+
+    # Approximate scores of all persisted rows, computed in chunks
+    def _scan_scores(self, query_vector: np.ndarray) -> np.ndarray:
+        if self._scan is None:
+            return np.asarray(self._full @ query_vector, dtype=np.float32)
+
+        matrix = self._scan
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _SCAN_CHUNK_ROWS):
+            chunk = np.asarray(matrix[start : start + _SCAN_CHUNK_ROWS], np.float32)
+            scores[start : start + len(chunk)] = chunk @ query_vector
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    # Yield (output row, float32 rows) for kept persisted rows followed by the delta
+    def _iter_rows(self, keep: List[int]):
+        written = 0
+        for start in range(0, len(keep), _COPY_CHUNK_ROWS):
+            rows = np.asarray(self._full[keep[start : start + _COPY_CHUNK_ROWS]])
+            yield written, rows
+            written += len(rows)
+        if self._delta:
+            yield written, np.vstack(self._delta)
+
+    def _delete_where(self, predicate) -> None:
+        self._deleted.update(
+            i
+            for i, (node_id, ref) in enumerate(zip(self._node_ids, self._ref_doc_ids))
+            if predicate(node_id, ref)
+        )
+        kept = [
+            i
+            for i, (node_id, ref) in enumerate(
+                zip(self._delta_node_ids, self._delta_ref_doc_ids)
+            )
+            if not predicate(node_id, ref)
+        ]
+        self._delta = [self._delta[i] for i in kept]
+        self._delta_node_ids = [self._delta_node_ids[i] for i in kept]
+        self._delta_ref_doc_ids = [self._delta_ref_doc_ids[i] for i in kept]
+
+
+# Approximate cosine search with an HNSW graph
+class HnswVectorStore(BasePydanticVectorStore):
+    stores_text: bool = False
+    # Graph construction / search quality (higher = better recall, slower)
+    m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 128
+
+    _index: Any = PrivateAttr(default=None)
+    _node_ids: Dict[int, str] = PrivateAttr(default_factory=dict)
+    _ref_doc_ids: Dict[int, str] = PrivateAttr(default_factory=dict)
+    _next_label: int = PrivateAttr(default=0)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HnswVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return self._index
+
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+
+        vectors = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        if self._index is None:
+            self._index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            self._index.init_index(
+                max_elements=max(1024, len(nodes)),
+                M=self.m,
+                ef_construction=self.ef_construction,
+            )
+
+        # Grow the graph capacity in steps
+        needed = self._index.get_current_count() + len(nodes)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+
+        labels = np.arange(self._next_label, self._next_label + len(nodes))
+        self._index.add_items(vectors, labels)
+        for label, node in zip(labels.tolist(), nodes):
+            self._node_ids[label] = node.node_id
+            self._ref_doc_ids[label] = node.ref_doc_id or node.node_id
+        self._next_label += len(nodes)
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        labels = [
+            label for label, ref in self._ref_doc_ids.items() if ref == ref_doc_id
+        ]
+        self._delete_labels(labels)
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Any = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        removed = set(node_ids or [])
+        labels = [
+            label for label, node_id in self._node_ids.items() if node_id in removed
+        ]
+        self._delete_labels(labels)
+
+    def clear(self) -> None:
+        self._index = None
+        self._node_ids, self._ref_doc_ids, self._next_label = {}, {}, 0
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None:
+            raise ValueError("Metadata filters are not supported by this backend")
+        if self._index is None or not self._node_ids:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        filter_fn = None
+        if query.node_ids is not None or query.doc_ids is not None:
+            allowed_nodes = set(query.node_ids or [])
+            allowed_docs = set(query.doc_ids or [])
+
+            def filter_fn(label: int) -> bool:
+                return (
+                    self._node_ids.get(label) in allowed_nodes
+                    or self._ref_doc_ids.get(label) in allowed_docs
+                )
+
+        k = min(query.similarity_top_k, len(self._node_ids))
+        self._index.set_ef(max(self.ef_search, k))
+        labels, distances = self._index.knn_query(
+            np.asarray(query.query_embedding, dtype=np.float32), k=k, filter=filter_fn
+        )
+        return VectorStoreQueryResult(
+            nodes=None,
+            similarities=[1.0 - float(d) for d in distances[0]],
+            ids=[self._node_ids[int(label)] for label in labels[0]],
+        )
+
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        persist_dir = Path(persist_path).parent
+        persist_dir.mkdir(parents=True, exist_ok=True)
+
+        if self._index is not None:
+            self._index.save_index(str(persist_dir / _HNSW_FILE))
+        with open(persist_dir / _IDS_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dim": self._index.dim if self._index is not None else None,
+                    "next_label": self._next_label,
+                    "node_ids": self._node_ids,
+                    "ref_doc_ids": self._ref_doc_ids,
+                },
+                f,
+            )
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str) -> "HnswVectorStore":
+        store = cls()
+        with open(Path(persist_dir) / _IDS_FILE, "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        store._node_ids = {int(k): v for k, v in ids["node_ids"].items()}
+        store._ref_doc_ids = {int(k): v for k, v in ids["ref_doc_ids"].items()}
+        store._next_label = ids["next_label"]
+        if ids["dim"] is not None:
+            store._index = hnswlib.Index(space="cosine", dim=ids["dim"])
+            store._index.load_index(str(Path(persist_dir) / _HNSW_FILE))
+        return store
+
+    def _delete_labels(self, labels: List[int]) -> None:
+        for label in labels:
+            self._index.mark_deleted(label)
+            del self._node_ids[label]
+            del self._ref_doc_ids[label]
+
+
+# Rows of the k highest scores, best first
+def _top_k(scores: np.ndarray, k: int) -> List[int]:
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])].tolist()
+
+
+# "vectors.npy" -> "vectors.<generation>.npy"
+def _generation_name(file_name: str, generation: int) -> str:
+    stem, suffix = file_name.rsplit(".", 1)
+    return f"{stem}.{generation}.{suffix}"
+
+
+# Delete matrix and delta files no longer named in the ids file
+def _remove_unused_files(persist_dir: Path, used) -> None:
+    used = set(used)
+    for path in persist_dir.glob("vectors*.npy*"):
+        if path.name not in used:
+            try:
+                path.unlink()
+            except OSError:
+                pass  # still mapped (Windows), removed by a later persist
+
+
+# Write an .npy file under a temporary name and swap it in
+def _save_npy(path: Path, array: np.ndarray) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+# Create (or overwrite) an .npy file and map it for writing
+def _open_memmap(path: Path, dtype, rows: int, dim: int) -> np.ndarray:
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(rows, dim))
@@ -0,0 +1,66 @@
+import json
+
+from src.vault_rag.answer_cache import AnswerCache
+
+SCOPE = AnswerCache.make_scope("/vault", "gpt-4o-mini", "hybrid/compact")
+
+
+# Sources as recorded by answer_sources
+def sources(**hashes) -> str:
+    return json.dumps(
+        {f"/vault/{name}.md": value for name, value in hashes.items()}, sort_keys=True
+    )
+
+
+def test_answer_is_reused_for_the_same_sources(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite3")
+    cache.put(SCOPE, "What is RAG?", "Retrieval.", sources(rag="h1", llm="h2"))
+
+    assert cache.get(SCOPE, "what is rag", sources(llm="h2", rag="h1")) == (
+        "Retrieval."
+    )
+    cache.close()
+
+
+def test_changed_source_note_is_a_miss(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite3")
+    cache.put(SCOPE, "What is RAG?", "Retrieval.", sources(rag="h1"), [1.0, 0.0])
+
+    assert cache.get(SCOPE, "What is RAG?", sources(rag="h9")) is None
+    assert cache.get_similar(SCOPE, [1.0, 0.0], 0.9, sources(rag="h9")) is None
+    cache.close()
+
+
+def test_added_note_is_a_miss(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite3")
+    cache.put(SCOPE, "What is RAG?", "Retrieval.", sources(rag="h1"), [1.0, 0.0])
+
+    # A new note is now retrieved for the question
+    assert cache.get(SCOPE, "What is RAG?", sources(rag="h1", new="h2")) is None
+    assert (
+        cache.get_similar(SCOPE, [1.0, 0.0], 0.9, sources(rag="h1", new="h2")) is None
+    )
+    cache.close()
+
+
+def test_similar_match_needs_the_same_sources(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite3")
+    cache.put(SCOPE, "Old question", "Old.", sources(old="h1"), [1.0, 0.0])
+    cache.put(SCOPE, "Other question", "Other.", sources(new="h2"), [0.9, 0.1])
+
+    assert cache.get_similar(SCOPE, [1.0, 0.0], 0.9, sources(new="h2")) == "Other."
+    cache.close()
+
+
+def test_scope_includes_retrieval_settings(tmp_path, monkeypatch):
+    from src.vault_rag.vault_rag import VaultRAG
+
+    monkeypatch.setenv("RAGSODY_DATA_DIR", str(tmp_path))
+    scopes = set()
+    for top_k, budget in [("5", "3000"), ("8", "3000"), ("5", "6000")]:
+        monkeypatch.setenv("SIMILARITY_TOP_K", top_k)
+        monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", budget)
+        rag = VaultRAG(str(tmp_path), "sk-test", "gpt-4o-mini")
+        scopes.add(rag._answer_scope("hybrid"))
+        rag.answer_cache.close()
+    assert len(scopes) == 3
@@ -0,0 +1,61 @@
+from typing import List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.indices.utils import embed_nodes
+from llama_index.core.ingestion import run_transformations
+from pydantic import PrivateAttr
+
+from src.vault_rag.embedding_cache import CachedEmbedding, EmbeddingCache
+from src.vault_rag.obsidian_parser import ObsidianMarkdownNodeParser
+from src.vault_rag.vault_loader import make_note_document
+
+NOTE = """---
+tags: [ml, notes]
+aliases: [Gradient descent]
+---
+# Optimizers
+
+Gradient descent follows the negative gradient of the loss.
+
+## Momentum
+
+Momentum keeps a running average of past gradients.
+"""
+
+
+# Embedding model that records the texts it is asked to embed
+class RecordingEmbedding(BaseEmbedding):
+    _texts: List[str] = PrivateAttr(default_factory=list)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._get_text_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_text_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        self._texts.append(text)
+        return [float(len(text)), 1.0]
+
+
+def embed_note(embed_model: CachedEmbedding, file_path) -> list:
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(NOTE, encoding="utf-8")
+    document = make_note_document(str(file_path), NOTE)
+    nodes = run_transformations([document], [ObsidianMarkdownNodeParser()])
+    return list(embed_nodes(nodes, embed_model).values())
+
+
+def test_renamed_note_is_not_embedded_again(tmp_path):
+    model = RecordingEmbedding(model_name="recording")
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    embed_model = CachedEmbedding(model, cache)
+
+    before = embed_note(embed_model, tmp_path / "vault" / "inbox" / "Optimizers.md")
+    embedded = len(model._texts)
+    after = embed_note(embed_model, tmp_path / "vault" / "archive" / "ML optimizers.md")
+
+    assert embedded > 0
+    assert len(model._texts) == embedded
+    assert sorted(after) == sorted(before)
+    cache.close()
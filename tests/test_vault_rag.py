@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.synthetic_vault import generate_vault, sample_questions
+
+
+@pytest.fixture
+def vault_rag(tmp_path, monkeypatch):
+    server = FakeOpenAIServer().start()
+    monkeypatch.setenv("RAGSODY_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_BASE", server.base_url)
+    monkeypatch.setenv("ANSWER_CACHE_TTL_HOURS", "0")
+    generate_vault(tmp_path / "vault", 60)
+
+    from src.vault_rag.vault_rag import VaultRAG
+
+    rag = VaultRAG(str(tmp_path / "vault"), "sk-test", "gpt-4o-mini")
+    rag.build_rag()
+    yield rag
+    server.stop()
+
+
+def test_queries_keep_working_during_rebuild(vault_rag):
+    errors = []
+    done = threading.Event()
+
+    def ask(mode):
+        questions = sample_questions(5, seed=len(mode))
+        while not done.is_set():
+            for question in questions:
+                result = vault_rag.query(question, mode=mode, stream=False, quiet=True)
+                if not result["success"]:
+                    errors.append(result["error"])
+                try:
+                    vault_rag.search_notes(question)
+                except Exception as e:
+                    errors.append(str(e))
+
+    threads = [
+        threading.Thread(target=ask, args=(mode,))
+        for mode in ["hybrid", "vector", "keyword", "keyword"]
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(3):
+            vault_rag.rebuild_index()
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert len(vault_rag.manifest) == 60
+    assert vault_rag.search_notes(sample_questions(1)[0])
+
+
+def test_failed_rebuild_save_keeps_the_persisted_index(vault_rag, monkeypatch):
+    from src.vault_rag.index_storage import get_staging_dir
+    from src.vault_rag.vault_rag import VaultRAG
+
+    saved_files = {
+        path.name: path.stat().st_mtime for path in vault_rag.index_dir.iterdir()
+    }
+
+    def fail(self, index_dir, manifest):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(VaultRAG, "_save_index_meta", fail)
+    vault_rag.rebuild_index()
+
+    assert not get_staging_dir(vault_rag.index_dir).exists()
+    assert saved_files == {
+        path.name: path.stat().st_mtime for path in vault_rag.index_dir.iterdir()
+    }
+    # The rebuilt index is used from memory
+    question = sample_questions(1)[0]
+    assert vault_rag.search_notes(question)
+    assert vault_rag.query(question, stream=False, quiet=True)["success"]
+
+
+def test_update_continues_from_index_saved_by_another_process(vault_rag, tmp_path):
+    from src.vault_rag.vault_rag import VaultRAG
+
+    # Another process (e.g. the daemon for another LLM model) adds a note
+    other = VaultRAG(vault_rag.vault_path, "sk-test", "gpt-4o")
+    other.build_rag()
+    note = tmp_path / "vault" / "Zanzibarquokka.md"
+    note.write_text("# Zanzibarquokka\n\nThe zanzibarquokka lives here.\n")
+    other.update_index(quiet=True)
+
+    # The index saved there is loaded instead of embedding the note again
+    changes = vault_rag.update_index(quiet=True)
+    assert not changes.has_changes()
+    assert str(note) in vault_rag.manifest
+    assert vault_rag.search_notes("zanzibarquokka")[0]["file_path"] == str(note)
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from src.vault_rag import vector_stores
+from src.vault_rag.vector_stores import NumpyVectorStore
+
+DIM = 16
+
+
+def make_nodes(rng, start: int, count: int) -> list:
+    return [
+        TextNode(
+            id_=f"node-{i}",
+            text="",
+            embedding=rng.normal(size=DIM).tolist(),
+            relationships={},
+        )
+        for i in range(start, start + count)
+    ]
+
+
+# Exact cosine top-k over the nodes still in the store
+def brute_force(vectors: dict, query: np.ndarray, k: int) -> list:
+    ids = list(vectors)
+    matrix = np.asarray([vectors[node_id] for node_id in ids])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    return [ids[i] for i in np.argsort(-scores)[:k]]
+
+
+def assert_matches(store: NumpyVectorStore, vectors: dict, rng) -> None:
+    for _ in range(10):
+        query = rng.normal(size=DIM)
+        result = store.query(
+            VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=5)
+        )
+        expected = brute_force(vectors, query, 5)
+        # The quantized scan may swap near ties, the best match must be exact
+        assert result.ids[0] == expected[0]
+        assert len(set(result.ids) & set(expected)) >= 4
+        assert set(result.ids) <= set(vectors)
+
+
+def persisted_files(persist_dir) -> set:
+    return {path.name for path in persist_dir.iterdir()}
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16", "none"])
+def test_persist_reload_with_delta_and_compaction(tmp_path, monkeypatch, quantization):
+    monkeypatch.setattr(vector_stores, "_COMPACT_MIN_ROWS", 20)
+    rng = np.random.default_rng(0)
+    persist_path = str(tmp_path / "default__vector_store.json")
+    vectors = {}
+
+    store = NumpyVectorStore(quantization=quantization)
+    nodes = make_nodes(rng, 0, 200)
+    store.add(nodes)
+    vectors.update({node.node_id: node.embedding for node in nodes})
+    store.persist(persist_path)
+    matrix_files = persisted_files(tmp_path) - {"vector_ids.json"}
+
+    # Small changes are saved as a delta next to the unchanged matrices
+    nodes = make_nodes(rng, 200, 5)
+    store.add(nodes)
+    vectors.update({node.node_id: node.embedding for node in nodes})
+    store.delete_nodes(["node-3", "node-202"])
+    del vectors["node-3"], vectors["node-202"]
+    store.persist(persist_path)
+    assert matrix_files < persisted_files(tmp_path)
+
+    store = NumpyVectorStore.from_persist_dir(str(tmp_path))
+    assert_matches(store, vectors, rng)
+
+    # Enough changes rewrite the matrices without the deleted rows
+    nodes = make_nodes(rng, 300, 30)
+    store.add(nodes)
+    vectors.update({node.node_id: node.embedding for node in nodes})
+    store.delete("node-10")
+    del vectors["node-10"]
+    store.persist(persist_path)
+    assert persisted_files(tmp_path).isdisjoint(matrix_files)
+    assert not any(
+        name.startswith("vectors_delta") for name in persisted_files(tmp_path)
+    )
+
+    store = NumpyVectorStore.from_persist_dir(str(tmp_path))
+    assert len(store._node_ids) == len(vectors)
+    assert_matches(store, vectors, rng)
+
+
+def test_deleted_rows_stay_deleted_after_reload(tmp_path):
+    rng = np.random.default_rng(1)
+    persist_path = str(tmp_path / "default__vector_store.json")
+    store = NumpyVectorStore()
+    nodes = make_nodes(rng, 0, 50)
+    store.add(nodes)
+    store.persist(persist_path)
+    store.delete_nodes(["node-7"])
+    store.persist(persist_path)
+
+    store = NumpyVectorStore.from_persist_dir(str(tmp_path))
+    result = store.query(
+        VectorStoreQuery(query_embedding=nodes[7].embedding, similarity_top_k=50)
+    )
+    assert "node-7" not in result.ids
+    assert len(result.ids) == 49